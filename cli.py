@@ -26,32 +26,68 @@ Requirements:
     - DB_CONNECTION environment variable (or --db-connection argument)
 """
 
+from __future__ import annotations
+
 import argparse
 import asyncio
+import atexit
+import copy
+import io
 import os
 import sys
-from pathlib import Path
-
-# Load environment variables from .env file if present
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # dotenv is optional
+import textwrap
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, redirect_stdout
+from typing import TYPE_CHECKING, Any, TextIO
 
 # Add project root to path for src package imports
-ROOT = Path(__file__).parent
-sys.path.insert(0, str(ROOT))
+ROOT = os.path.abspath(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+if TYPE_CHECKING:
+    from src.agent import SQLOptimizationAgent
+    from src.validators.base import ValidationResult
+
+# Heavy imports (psycopg2, the agent stack, display) are deferred to the
+# functions that need them so `--help` and argument errors stay stdlib-only.
 
-from src.agent import SQLOptimizationAgent
-from src.display import display
-from src.validators.base import ValidationResult
-from urllib.parse import urlparse
-import psycopg2
+# Optimization result LRU:
+# (query fingerprint, db, max_cost, max_time_ms, validate, skip passing) -> result
+RESULT_CACHE_SIZE = 1024
+_result_cache: OrderedDict[tuple, dict] = OrderedDict()
+
+# Default number of query-file statements optimized at once. The agent
+# runs real DDL, so concurrent queries can affect each other's costs;
+# running them one at a time is the default.
+QUERY_FILE_CONCURRENCY = 1
+
+# Chat input history, shared by the prompt_toolkit and readline readers
+HISTORY_FILE = os.path.join(os.path.expanduser('~'), '.exque_history')
+HISTORY_LENGTH = 1000
+
+
+def split_queries(text: str) -> list[str]:
+    """
+    Split a SQL file into its statements.
+
+    sqlparse.split respects semicolons inside literals and comments, but
+    returns a comment after the last ';' as a statement of its own; those
+    comment-only pieces are dropped.
+    """
+    import sqlparse
+
+    return [
+        q.strip() for q in sqlparse.split(text)
+        if sqlparse.format(q, strip_comments=True).strip()
+    ]
 
 
 def extract_db_name(connection_string: str) -> str:
     """Extract database name from connection string."""
+    from urllib.parse import urlparse
+
     try:
         parsed = urlparse(connection_string)
         db_name = parsed.path.lstrip('/')
@@ -60,128 +96,177 @@ def extract_db_name(connection_string: str) -> str:
         return "unknown"
 
 
-def test_connection(connection_string: str) -> tuple[bool, str]:
-    """Test database connection. Returns (success, error_message)."""
+def connect_and_examine(connection_string: str) -> tuple[bool, int | None, str]:
+    """
+    Test the database connection and examine its schema over one connection.
+
+    Returns (connected, table_count, error_message). table_count is None when
+    the connection succeeded but the schema could not be examined.
+    """
+    import psycopg2
+
     try:
         conn = psycopg2.connect(connection_string)
-        conn.close()
-        return True, ""
     except Exception as e:
-        return False, str(e)
-
+        return False, None, str(e)
 
-def examine_database(connection_string: str) -> tuple[bool, int, str]:
-    """
-    Examine database schema to understand structure.
-    Returns (success, table_count, error_message).
-    """
     try:
-        conn = psycopg2.connect(connection_string)
         with conn.cursor() as cur:
             cur.execute("""
-                SELECT COUNT(*) FROM information_schema.tables
-                WHERE table_schema = CURRENT_SCHEMA AND table_type = 'BASE TABLE'
+                SELECT COUNT(*) FROM pg_catalog.pg_class c
+                JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = CURRENT_SCHEMA AND c.relkind IN ('r', 'p')
             """)
             table_count = cur.fetchone()[0]
-        conn.close()
-        return True, table_count, ""
     except Exception as e:
-        return False, 0, str(e)
+        return True, None, str(e)
+    finally:
+        conn.close()
 
+    return True, table_count, ""
 
-def print_validation_result(validation: ValidationResult):
-    """Print validation result in user-friendly format."""
-    display.newline()
-    display.subheader("Correctness Validation")
 
-    if validation.passed:
-        display.success(f"✓ Validation PASSED ({validation.method})")
-        display.metric("Confidence", f"{validation.confidence * 100:.0f}%")
-        display.metric("Queries Executed", str(validation.queries_executed))
-        display.metric("Validation Time", f"{validation.execution_time_ms:.0f}ms")
+@contextmanager
+def buffered_output(out: TextIO | None = None):
+    """
+    Collect everything printed inside the block and emit it in a single write.
 
-        if validation.confidence < 0.5:
-            display.warning(f"Note: {validation.metadata.get('reason', 'Low confidence validation')}")
-    else:
-        display.error(f"✗ Validation FAILED ({validation.method})")
-        display.metric("Confidence", f"{validation.confidence * 100:.0f}%")
+    Args:
+        out: Destination stream (default: sys.stdout at exit time)
+    """
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            yield
+    finally:
+        out = out or sys.stdout
+        out.write(buf.getvalue())
+        out.flush()
 
-        display.newline()
-        display.subheader("Issues Detected")
-        for i, issue in enumerate(validation.issues, 1):
-            print(f"\n{i}. **{issue.issue_type}** [{issue.severity}]")
-            print(f"   {issue.description}")
-
-            if issue.evidence:
-                print(f"   ")
-                print(f"   Evidence:")
-                for key, value in issue.evidence.items():
-                    if key.startswith('example_'):
-                        continue  # Skip example rows for brevity
-                    print(f"     - {key}: {value}")
-
-            if issue.suggested_fix:
-                print(f"   ")
-                print(f"   Suggested fix:")
-                for line in issue.suggested_fix.split('\n'):
-                    print(f"   {line}")
 
-        display.newline()
-        display.warning(
-            "Query may return incorrect results. Fix issues before optimizing performance."
-        )
+def _print_validation_passed(validation: ValidationResult):
+    """Print the summary of a passed validation."""
+    from src.display import display
+
+    display.success(f"✓ Validation PASSED ({validation.method})")
+    display.metric("Confidence", f"{validation.confidence * 100:.0f}%")
+    display.metric("Queries Executed", str(validation.queries_executed))
+    display.metric("Validation Time", f"{validation.execution_time_ms:.0f}ms")
+
+    if validation.confidence < 0.5:
+        display.warning(f"Note: {validation.metadata.get('reason', 'Low confidence validation')}")
+
+
+def _print_validation_failed(validation: ValidationResult):
+    """Print a failed validation with each detected issue."""
+    from src.display import display
+
+    display.error(f"✗ Validation FAILED ({validation.method})")
+    display.metric("Confidence", f"{validation.confidence * 100:.0f}%")
 
     display.newline()
+    display.subheader("Issues Detected")
+    for i, issue in enumerate(validation.issues, 1):
+        lines = [f"\n{i}. **{issue.issue_type}** [{issue.severity}]", f"   {issue.description}"]
+
+        if issue.evidence:
+            lines += ["   ", "   Evidence:"]
+            lines.extend(
+                f"     - {key}: {value}"
+                for key, value in issue.evidence.items()
+                if not key.startswith('example_')  # Skip example rows for brevity
+            )
+
+        if issue.suggested_fix:
+            lines += ["   ", "   Suggested fix:"]
+            lines.append("   " + issue.suggested_fix.replace("\n", "\n   "))
 
+        print('\n'.join(lines))
 
-def print_result(result: dict):
-    """Print optimization result in markdown format."""
     display.newline()
+    display.warning(
+        "Query may return incorrect results. Fix issues before optimizing performance."
+    )
 
-    # Show validation results if present
-    if 'validation' in result and result['validation']:
-        print_validation_result(result['validation'])
 
-    # Status
-    if result['success']:
-        display.success("Optimization successful")
-    else:
-        display.warning("Could not fully optimize query")
+def print_validation_result(validation: ValidationResult, out: TextIO | None = None):
+    """
+    Print validation result in user-friendly format.
+
+    Output is collected and written to `out` (default: sys.stdout) in one write.
+    """
+    from src.display import display
+
+    with buffered_output(out):
+        display.newline()
+        display.subheader("Correctness Validation")
+
+        if validation.passed:
+            _print_validation_passed(validation)
+        else:
+            _print_validation_failed(validation)
 
-    if result['reason']:
-        print(f"  {result['reason']}")
+        display.newline()
 
-    # Final query
-    display.section("Final Query", result['final_query'], code_block=True)
 
-    # Actions taken
-    if result['actions']:
-        display.subheader("Actions Taken")
-        for i, action in enumerate(result['actions'], 1):
-            print(f"{i}. **{action.type.value}**")
-            print(f"   {action.reasoning}")
-            if action.ddl:
-                print(f"   DDL: `{action.ddl}`")
-            if action.new_query:
-                print(f"   New Query: `{action.new_query[:60]}...`")
+def print_result(result: dict, out: TextIO | None = None):
+    """
+    Print optimization result in markdown format.
 
-    # Metrics
-    if result['metrics']:
-        display.subheader("Performance Metrics")
+    Output is collected and written to `out` (default: sys.stdout) in one write.
+    """
+    from src.display import display
 
-        initial_cost = result['metrics'].get('initial_cost', 0)
-        final_cost = result['metrics'].get('final_cost', 0)
+    with buffered_output(out):
+        display.newline()
 
-        if initial_cost > 0 and final_cost > 0:
-            improvement_pct = ((initial_cost - final_cost) / initial_cost) * 100
-            improvement_str = f"({improvement_pct:,.1f}% improvement)" if improvement_pct > 0 else ""
-            display.metric("Query Cost", f"{initial_cost:,.0f} → {final_cost:,.0f}", improvement_str)
-        elif final_cost > 0:
-            display.metric("Query Cost", f"{final_cost:,.0f}")
+        # Show validation results if present
+        if 'validation' in result and result['validation']:
+            print_validation_result(result['validation'])
 
-        final_time = result['metrics'].get('final_time_ms', 0)
-        if final_time > 0:
-            display.metric("Execution Time", f"{final_time:,.0f}ms")
+        # Status
+        if result['success']:
+            display.success("Optimization successful")
+        else:
+            display.warning("Could not fully optimize query")
+
+        if result['reason']:
+            print(f"  {result['reason']}")
+
+        # Final query
+        display.section("Final Query", result['final_query'], code_block=True)
+
+        # Actions taken
+        if result['actions']:
+            display.subheader("Actions Taken")
+            for i, action in enumerate(result['actions'], 1):
+                ddl, new_query = action.ddl, action.new_query
+                lines = [f"{i}. **{action.type.value}**", f"   {action.reasoning}"]
+                if ddl:
+                    lines.append(f"   DDL: `{ddl}`")
+                if new_query:
+                    short = textwrap.shorten(new_query, width=60, placeholder='...')
+                    lines.append(f"   New Query: `{short}`")
+                print('\n'.join(lines))
+
+        # Metrics
+        metrics = result['metrics']
+        if metrics:
+            display.subheader("Performance Metrics")
+
+            initial_cost = metrics.get('initial_cost', 0)
+            final_cost = metrics.get('final_cost', 0)
+
+            if initial_cost > 0 and final_cost > 0:
+                improvement_pct = ((initial_cost - final_cost) / initial_cost) * 100
+                improvement_str = f"({improvement_pct:,.1f}% improvement)" if improvement_pct > 0 else ""
+                display.metric("Query Cost", f"{initial_cost:,.0f} → {final_cost:,.0f}", improvement_str)
+            elif final_cost > 0:
+                display.metric("Query Cost", f"{final_cost:,.0f}")
+
+            final_time = metrics.get('final_time_ms', 0)
+            if final_time > 0:
+                display.metric("Execution Time", f"{final_time:,.0f}ms")
 
 
 async def validate_query_only(agent: SQLOptimizationAgent, query: str, db_connection: str):
@@ -190,6 +275,8 @@ async def validate_query_only(agent: SQLOptimizationAgent, query: str, db_connec
 
     Runs correctness validation without performance optimization.
     """
+    from src.display import display
+
     display.section("Validating Query Correctness", query, code_block=True)
 
     # Run validation directly
@@ -207,8 +294,90 @@ async def validate_query_only(agent: SQLOptimizationAgent, query: str, db_connec
     return {'success': True, 'validation': validation}
 
 
+def query_fingerprint(query: str) -> str:
+    """
+    Normalize a query for use as a result-cache key.
+
+    Comments, whitespace runs, keyword case and trailing semicolons are
+    normalized away in a single pass over sqlparse's token stream. Literals
+    are left untouched, since the cached result holds a rewritten query and
+    index DDL for those exact values.
+    """
+    from sqlparse import lexer, tokens
+
+    parts: list[str] = []
+    gap = False
+    for ttype, value in lexer.tokenize(query):
+        if ttype in tokens.Whitespace or ttype in tokens.Comment:
+            gap = True
+            continue
+        if gap and parts:
+            parts.append(' ')
+        gap = False
+        parts.append(value.upper() if ttype in tokens.Keyword else value)
+    return ''.join(parts).rstrip(';').rstrip()
+
+
+async def optimize_query_cached(
+    agent: SQLOptimizationAgent,
+    query: str,
+    db_connection: str,
+    args,
+    validate_correctness: bool,
+) -> dict:
+    """
+    Run agent.optimize_query, reusing the result for a repeated query.
+
+    Only successful results are cached (a failed run may succeed on retry).
+    The key is the query's fingerprint, so reformatted input still hits.
+    Callers get their own copy, so changing a result never alters the cache.
+    """
+    skip_passing = getattr(args, 'skip_passing', False)
+    key = (
+        query_fingerprint(query),
+        db_connection,
+        args.max_cost,
+        args.max_time_ms,
+        validate_correctness,
+        skip_passing,
+    )
+    cached = _result_cache.get(key)
+    if cached is not None:
+        _result_cache.move_to_end(key)
+        return copy.deepcopy(cached)
+
+    result = await agent.optimize_query(
+        sql=query,
+        db_connection=db_connection,
+        max_cost=args.max_cost,
+        max_time_ms=args.max_time_ms,
+        validate_correctness=validate_correctness,
+        skip_if_within_constraints=skip_passing,
+    )
+
+    if result.get('success'):
+        _result_cache[key] = copy.deepcopy(result)
+        if len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+    return result
+
+
+def build_agent(args) -> SQLOptimizationAgent:
+    """Create an optimization agent configured from the parsed arguments."""
+    from src.agent import SQLOptimizationAgent
+
+    return SQLOptimizationAgent(
+        max_iterations=args.max_iterations,
+        use_thinking=not args.no_extended_thinking,
+        thinking_budget=args.thinking_budget,
+        statement_timeout_ms=args.statement_timeout,
+    )
+
+
 async def optimize_single_query(agent: SQLOptimizationAgent, query: str, db_connection: str, args):
     """Optimize a single query."""
+    from src.display import display
+
     display.section("Query to Optimize", query, code_block=True)
 
     # Check if validation-only mode
@@ -219,110 +388,363 @@ async def optimize_single_query(agent: SQLOptimizationAgent, query: str, db_conn
     # Normal optimization with optional validation
     validate_correctness = not getattr(args, 'no_validation', False)
 
-    result = await agent.optimize_query(
-        sql=query,
-        db_connection=db_connection,
-        max_cost=args.max_cost,
-        max_time_ms=args.max_time_ms,
-        validate_correctness=validate_correctness,
+    result = await optimize_query_cached(
+        agent, query, db_connection, args, validate_correctness
     )
 
     print_result(result)
     return result
 
 
+async def optimize_query_batch(
+    agent: SQLOptimizationAgent, queries: list[str], db_connection: str, args
+) -> list[dict[str, Any] | BaseException]:
+    """
+    Optimize the queries of a --query-file, printing each result.
+
+    By default queries run one at a time on `agent`, with its live progress
+    output. With args.concurrency > 1, up to that many run at once, each on
+    its own agent (built by build_agent) with progress output muted; every
+    result is printed, header included, in one write as soon as its query
+    finishes. The agent creates real indexes, so concurrent queries on the
+    same tables can see each other's indexes in their costs.
+
+    Returns results in input order (an exception stands in for a failure).
+    """
+    from src.display import display
+
+    total = len(queries)
+    validate_correctness = not getattr(args, 'no_validation', False)
+    concurrency = getattr(args, 'concurrency', QUERY_FILE_CONCURRENCY)
+    results: list[dict[str, Any] | BaseException] = []
+
+    if getattr(args, 'validate_only', False) or concurrency == 1:
+        for i, query in enumerate(queries, 1):
+            display.section(f"Query {i} of {total}", query, code_block=True)
+            try:
+                if getattr(args, 'validate_only', False):
+                    result = await validate_query_only(agent, query, db_connection)
+                else:
+                    result = await optimize_query_cached(
+                        agent, query, db_connection, args, validate_correctness
+                    )
+                    print_result(result)
+            except Exception as e:
+                display.error(f"Error: {e}")
+                results.append(e)
+            else:
+                results.append(result)
+        return results
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, query: str) -> tuple[int, dict[str, Any] | BaseException]:
+        result: dict[str, Any] | BaseException
+        async with semaphore:
+            # A private agent keeps plan caches, hypopg state and DDL
+            # bookkeeping per query; muting applies to this task only
+            with display.muted():
+                try:
+                    result = await optimize_query_cached(
+                        build_agent(args), query, db_connection, args, validate_correctness
+                    )
+                except Exception as e:
+                    result = e
+        return index, result
+
+    tasks = [asyncio.create_task(run(i, q)) for i, q in enumerate(queries)]
+    ordered: list[dict[str, Any] | BaseException | None] = [None] * total
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result = await next_done
+            ordered[index] = result
+            # Header and result go out together in one write
+            with buffered_output():
+                display.section(f"Query {index + 1} of {total}", queries[index], code_block=True)
+                if isinstance(result, BaseException):
+                    display.error(f"Error: {result}")
+                else:
+                    print_result(result)
+    finally:
+        # Interrupted (e.g. Ctrl+C) - don't leave optimizations running
+        for task in tasks:
+            task.cancel()
+    return [r for r in ordered if r is not None]
+
+
+def read_query(prompt: str, continuation_prompt: str) -> str:
+    """
+    Read a query from stdin, supporting multi-line input.
+
+    A single line ending with ';' is accepted immediately; otherwise input
+    continues until an empty line. Raises EOFError when stdin is closed.
+    """
+    write = sys.stdout.write
+    write(prompt)
+    sys.stdout.flush()
+    lines: list[str] = []
+    while True:
+        line = input()
+        stripped = line.strip()
+        if not stripped:
+            if lines:
+                # Empty line after content - end of input
+                break
+            continue
+        lines.append(line)
+        if stripped.endswith(';'):
+            # If single line ends with semicolon, accept it
+            if len(lines) == 1:
+                break
+        else:
+            # For multi-line, show continuation prompt
+            write(continuation_prompt)
+            sys.stdout.flush()
+
+    return '\n'.join(lines).strip()
+
+
+async def read_query_async(prompt: str, continuation_prompt: str) -> str:
+    """
+    Read a query without blocking the event loop.
+
+    input() runs on a daemon thread (so an abandoned read never holds up
+    interpreter exit) and its result or exception is handed back to the loop.
+    """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[str] = loop.create_future()
+
+    def deliver(result: str | None, error: BaseException | None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result or '')
+
+    def reader() -> None:
+        result, error = None, None
+        try:
+            result = read_query(prompt, continuation_prompt)
+        except BaseException as e:  # EOFError/KeyboardInterrupt go to the awaiting task
+            error = e
+        try:
+            loop.call_soon_threadsafe(deliver, result, error)
+        except RuntimeError:
+            pass  # Loop already closed - nobody is waiting
+
+    threading.Thread(target=reader, name="chat-input", daemon=True).start()
+    return await future
+
+
+def restore_terminal_at_exit() -> None:
+    """
+    Put the terminal back the way it is now when the interpreter exits.
+
+    A Ctrl+C can end the session while the input thread is still inside
+    readline, which leaves echo and canonical mode switched off.
+    """
+    try:
+        import termios
+    except ImportError:
+        return  # Not a POSIX terminal (e.g. Windows)
+
+    try:
+        fd = sys.stdin.fileno()
+        saved = termios.tcgetattr(fd)
+    except (OSError, ValueError, termios.error):
+        return  # stdin is not a terminal
+
+    def restore():
+        try:
+            termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+        except (OSError, termios.error):
+            pass
+
+    atexit.register(restore)
+
+
+def enable_readline_history(history_file: str = HISTORY_FILE) -> bool:
+    """
+    Give input() persistent history and Tab completion of chat commands.
+
+    History is loaded from `history_file` and saved back at exit.
+    Returns False when the readline module is unavailable (e.g. Windows).
+    """
+    try:
+        import readline
+    except ImportError:
+        return False
+
+    try:
+        readline.read_history_file(history_file)
+    except OSError:
+        pass  # First run or unreadable - start with empty history
+    readline.set_history_length(HISTORY_LENGTH)
+
+    def save_history():
+        try:
+            readline.write_history_file(history_file)
+        except OSError:
+            pass
+
+    atexit.register(save_history)
+
+    commands = sorted(CHAT_COMMANDS)
+
+    def complete(text: str, state: int) -> str | None:
+        matches = [c for c in commands if c.startswith(text.lower())]
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(complete)
+    if 'libedit' in (readline.__doc__ or ''):
+        readline.parse_and_bind('bind ^I rl_complete')  # macOS system Python
+    else:
+        readline.parse_and_bind('tab: complete')
+    return True
+
+
+def make_query_reader(prompt: str, continuation_prompt: str):
+    """
+    Return an async callable that reads one query.
+
+    Uses a prompt_toolkit session when it is installed (the `repl` extra):
+    Enter submits once the buffer ends with ';' or a blank line, and the
+    prompt awaits on the event loop itself. Otherwise falls back to read_query_async, with readline
+    history where available. Both keep history in HISTORY_FILE.
+    """
+    try:
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.filters import Condition
+        from prompt_toolkit.formatted_text import ANSI
+        from prompt_toolkit.history import FileHistory
+    except ImportError:
+        restore_terminal_at_exit()
+        enable_readline_history()
+        return lambda: read_query_async(prompt, continuation_prompt)
+
+    session: PromptSession[str] = PromptSession(history=FileHistory(HISTORY_FILE))
+    continuation = ANSI(continuation_prompt)
+
+    @Condition
+    def needs_more_input() -> bool:
+        text = session.default_buffer.text
+        stripped = text.rstrip()
+        return bool(stripped) and not stripped.endswith(';') and not text.endswith('\n')
+
+    async def read() -> str:
+        text: str = await session.prompt_async(
+            ANSI(prompt),
+            multiline=needs_more_input,
+            prompt_continuation=lambda width, line_number, is_soft_wrap: continuation,
+        )
+        return text.strip()
+
+    return read
+
+
+def _quit_command(agent: SQLOptimizationAgent, args) -> bool:
+    from src.display import display
+
+    display.success("Goodbye!")
+    return False
+
+
+def _help_command(agent: SQLOptimizationAgent, args) -> bool:
+    sys.stdout.write(
+        "\nCommands:\n"
+        "  quit     - Exit the program\n"
+        "  help     - Show this help message\n"
+        "  config   - Show current configuration\n"
+        "\nEnter any SQL query to optimize it.\n\n"
+    )
+    return True
+
+
+def _config_command(agent: SQLOptimizationAgent, args) -> bool:
+    from src.display import display
+
+    display.subheader("Current Configuration")
+    print(f"  Max Cost: {args.max_cost}")
+    print(f"  Max Time: {args.max_time_ms}ms")
+    print(f"  Extended Thinking: {agent.use_thinking}")
+    print(f"  Thinking Budget: {agent.thinking_budget} tokens")
+    print(f"  Statement Timeout: {agent.statement_timeout_ms}ms")
+    print(f"  Safety Iteration Limit: {agent.max_iterations}\n")
+    return True
+
+
+# Chat commands: handler(agent, args) returns False to end the session
+CHAT_COMMANDS = {
+    'quit': _quit_command,
+    'help': _help_command,
+    'config': _config_command,
+}
+# Longer input can't be a command, so it is never lowercased
+_MAX_COMMAND_LEN = max(map(len, CHAT_COMMANDS))
+
+
 async def chat_mode(agent: SQLOptimizationAgent, db_connection: str, args):
     """Run in chat mode."""
+    from src.display import display
+
     display.header("Exque Environment")
 
     # Extract database name
     db_name = extract_db_name(db_connection)
 
-    # Test connection
+    # Test connection and examine database schema
     print(f"  {display.DIM}database:{display.RESET} {db_name}")
-    connected, conn_error = test_connection(db_connection)
-    if connected:
-        print(f"  {display.DIM}connected:{display.RESET} {display.GREEN}success{display.RESET}")
-    else:
+    connected, table_count, conn_error = await asyncio.to_thread(
+        connect_and_examine, db_connection
+    )
+    if not connected:
         print(f"  {display.DIM}connected:{display.RESET} {display.RED}failure{display.RESET}")
         display.error(f"Connection error: {conn_error}")
         return
 
-    # Examine database schema
-    print(f"  {display.DIM}examined:{display.RESET} {display.YELLOW}loading{display.RESET}", end='', flush=True)
-    examined, table_count, exam_error = examine_database(db_connection)
-    # Clear loading and print final status
-    print(f"\r  {display.DIM}examined:{display.RESET} ", end='')
-    if examined:
-        print(f"{display.GREEN}success{display.RESET} ({table_count} tables)")
+    print(f"  {display.DIM}connected:{display.RESET} {display.GREEN}success{display.RESET}")
+    if table_count is not None:
+        print(f"  {display.DIM}examined:{display.RESET} {display.GREEN}success{display.RESET} ({table_count} tables)")
     else:
-        print(f"{display.RED}failure{display.RESET}")
-        display.warning(f"Could not examine database: {exam_error}")
+        print(f"  {display.DIM}examined:{display.RESET} {display.RED}failure{display.RESET}")
+        display.warning(f"Could not examine database: {conn_error}")
 
     print("\nEnter SQL queries to optimize (or 'quit' to exit)")
     print("Commands: quit, help, config\n")
 
+    # Prompts are fixed for the session - build them once
+    sql_prompt = f"{display.CYAN}SQL>{display.RESET} "
+    continuation_prompt = f"{display.CYAN}...>{display.RESET} "
+    read_next_query = make_query_reader(sql_prompt, continuation_prompt)
+
     while True:
         try:
             # Get query from user (support multi-line)
-            print(f"{display.CYAN}SQL>{display.RESET} ", end='')
-            lines = []
-            while True:
-                line = input()
-                if not line.strip() and lines:
-                    # Empty line after content - end of input
-                    break
-                if line.strip():
-                    lines.append(line)
-                    # If single line ends with semicolon, accept it
-                    if line.strip().endswith(';') and len(lines) == 1:
-                        break
-                    # For multi-line, show continuation prompt
-                    if lines and not line.strip().endswith(';'):
-                        print(f"{display.CYAN}...>{display.RESET} ", end='')
-
-            query = '\n'.join(lines).strip()
+            query = await read_next_query()
 
             if not query:
                 continue
 
-            # Handle commands
-            if query.lower() == 'quit':
-                display.success("Goodbye!")
-                break
-
-            if query.lower() == 'help':
-                print("\nCommands:")
-                print("  quit     - Exit the program")
-                print("  help     - Show this help message")
-                print("  config   - Show current configuration")
-                print("\nEnter any SQL query to optimize it.\n")
-                continue
-
-            if query.lower() == 'config':
-                display.subheader("Current Configuration")
-                print(f"  Max Cost: {args.max_cost}")
-                print(f"  Max Time: {args.max_time_ms}ms")
-                print(f"  Extended Thinking: {agent.use_thinking}")
-                print(f"  Thinking Budget: {agent.thinking_budget} tokens")
-                print(f"  Statement Timeout: {agent.statement_timeout_ms}ms")
-                print(f"  Safety Iteration Limit: {agent.max_iterations}\n")
+            # Handle commands (all short, so skip lowercasing full SQL text)
+            if len(query) <= _MAX_COMMAND_LEN and (
+                handler := CHAT_COMMANDS.get(query.lower())
+            ):
+                if not handler(agent, args):
+                    break
                 continue
 
             # Optimize the query
             validate_correctness = not getattr(args, 'no_validation', False)
 
-            result = await agent.optimize_query(
-                sql=query,
-                db_connection=db_connection,
-                max_cost=args.max_cost,
-                max_time_ms=args.max_time_ms,
-                validate_correctness=validate_correctness,
+            result = await optimize_query_cached(
+                agent, query, db_connection, args, validate_correctness
             )
 
             print_result(result)
 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # Ctrl+C cancels the main task while it awaits input/optimization
             display.success("\nGoodbye!")
             break
         except EOFError:
@@ -332,8 +754,10 @@ async def chat_mode(agent: SQLOptimizationAgent, db_connection: str, args):
             display.error(f"Error: {e}\n")
 
 
-async def main():
-    """Main entry point."""
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser (only when real parsing is needed)."""
+    import src  # Cheap: the package resolves its exports lazily
+
     parser = argparse.ArgumentParser(
         description="Exque Environment - Autonomous SQL query optimization",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -360,10 +784,12 @@ Examples:
         help='PostgreSQL connection string (default: $DB_CONNECTION env var)'
     )
 
+    parser.add_argument('--version', action='version', version=f"exque {src.__version__}")
+
     # Query input (optional - defaults to chat mode)
     query_group = parser.add_mutually_exclusive_group()
     query_group.add_argument('--query', help='SQL query to optimize (single query mode)')
-    query_group.add_argument('--query-file', help='File containing SQL query (single query mode)')
+    query_group.add_argument('--query-file', help='File containing one or more ;-separated SQL queries')
 
     # Optimization parameters
     parser.add_argument('--max-cost', type=float, default=500.0,
@@ -372,6 +798,14 @@ Examples:
                        help='Maximum acceptable execution time in ms (default: 50)')
     parser.add_argument('--max-iterations', type=int, default=10,
                        help='Maximum optimization iterations (default: 10)')
+    parser.add_argument('--skip-passing', action='store_true',
+                       help='Skip optimization (and LLM calls) for queries already within '
+                            '--max-cost/--max-time-ms')
+    parser.add_argument('--concurrency', type=int, default=QUERY_FILE_CONCURRENCY,
+                       help='Queries from --query-file optimized at once, each by its own '
+                            'agent with progress output hidden. Indexes created for one '
+                            'query can affect the costs of others '
+                            f'(default: {QUERY_FILE_CONCURRENCY})')
 
     # Agent configuration
     parser.add_argument('--no-extended-thinking', action='store_true',
@@ -387,7 +821,24 @@ Examples:
     parser.add_argument('--no-validation', action='store_true',
                        help='Skip correctness validation (only optimize performance)')
 
+    return parser
+
+
+async def main():
+    """Main entry point."""
+    parser = _build_parser()
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    from src.display import display
+
+    # Load environment variables from .env file if present
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # dotenv is optional
 
     # Check for API key
     if not os.environ.get('ANTHROPIC_API_KEY'):
@@ -402,31 +853,50 @@ Examples:
         print("Either set DB_CONNECTION environment variable or use --db-connection argument")
         sys.exit(1)
 
+    # Reject a malformed DSN before paying for agent/LLM client setup
+    import psycopg2
+    from psycopg2.extensions import parse_dsn
+
+    try:
+        parse_dsn(db_connection)
+    except psycopg2.ProgrammingError as e:
+        display.error(f"Invalid database connection string: {e}")
+        sys.exit(1)
+
     # Initialize agent
-    agent = SQLOptimizationAgent(
-        max_iterations=args.max_iterations,
-        use_thinking=not args.no_extended_thinking,
-        thinking_budget=args.thinking_budget,
-        statement_timeout_ms=args.statement_timeout,
-    )
+    agent = build_agent(args)
 
     # Run based on mode (chat mode by default)
     if args.query or args.query_file:
         # Single query mode
         if args.query_file:
-            query_path = Path(args.query_file)
-            if not query_path.exists():
+            try:
+                with open(args.query_file, 'rb') as f:
+                    text = f.read().decode('utf-8')
+            except FileNotFoundError:
                 display.error(f"File not found: {args.query_file}")
                 sys.exit(1)
-            query = query_path.read_text().strip()
+
+            queries = split_queries(text)
         else:
-            query = args.query
+            queries = [args.query]
 
-        await optimize_single_query(agent, query, db_connection, args)
+        if len(queries) > 1:
+            await optimize_query_batch(agent, queries, db_connection, args)
+        elif queries:
+            await optimize_single_query(agent, queries[0], db_connection, args)
+        else:
+            display.error(f"No SQL statements found in {args.query_file}")
+            sys.exit(1)
     else:
         # Chat mode (default)
         await chat_mode(agent, db_connection, args)
 
 
 if __name__ == '__main__':
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -18,36 +18,31 @@ Requirements:
 import asyncio
 import os
 import sys
+import traceback
 
-# Load environment variables from .env file if present
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # dotenv is optional
+# cli sits next to this script (so it is importable when the script runs)
+# and puts the project root on sys.path for the src package imports
+from cli import print_result
 
-# Add project root to path for src package imports
-ROOT = os.path.abspath(os.path.dirname(__file__))
-if ROOT not in sys.path:
-    sys.path.insert(0, ROOT)
+# The agent stack (LLM client, psycopg2, validators) is imported inside the
+# demos so a missing API key is reported without loading it.
 
-from src.agent import SQLOptimizationAgent
+# Banner rule, built once rather than per print
+RULE = "=" * 70
 
 
-async def demo_index_optimization():
+def banner(title: str):
+    """Print a title between two rules in a single write."""
+    sys.stdout.write(f"\n{RULE}\n{title}\n{RULE}\n")
+
+
+async def demo_index_optimization(db_conn: str):
     """
     Demo: Simple query optimization (Seq Scan → Index Scan)
     """
-    print("\n" + "=" * 70)
-    print("DEMO: Autonomous Index Creation")
-    print("=" * 70)
+    from src.agent import SQLOptimizationAgent
 
-    # Get database connection from environment
-    db_conn = os.environ.get("DB_CONNECTION")
-    if not db_conn:
-        print("Error: DB_CONNECTION environment variable not set")
-        print("   Example: export DB_CONNECTION='postgresql://localhost:5432/testdb'")
-        sys.exit(1)
+    banner("DEMO: Autonomous Index Creation")
 
     # Initialize agent
     agent = SQLOptimizationAgent(
@@ -60,8 +55,7 @@ async def demo_index_optimization():
     # Example query with performance issues
     query = "SELECT * FROM users WHERE email = 'alice@example.com'"
 
-    print(f"\nQuery: {query}")
-    print(f"Database: {db_conn}\n")
+    sys.stdout.write(f"\nQuery: {query}\nDatabase: {db_conn}\n\n")
 
     # Run autonomous optimization
     result = await agent.optimize_query(
@@ -72,44 +66,19 @@ async def demo_index_optimization():
     )
 
     # Display results
-    print("\n" + "=" * 70)
-    print("OPTIMIZATION COMPLETE")
-    print("=" * 70)
-    print(f"Success:       {result['success']}")
-    print(f"Reason:        {result['reason']}")
-    print(f"Final Query:   {result['final_query']}")
-
-    if result['actions']:
-        print("\nActions Taken:")
-        for i, action in enumerate(result['actions'], 1):
-            print(f"  {i}. {action.type.value}")
-            print(f"     Reasoning: {action.reasoning}")
-            if action.ddl:
-                print(f"     DDL: {action.ddl}")
-            if action.new_query:
-                print(f"     New Query: {action.new_query[:60]}...")
-            print()
-
-    if result['metrics']:
-        print("Performance Metrics:")
-        for key, value in result['metrics'].items():
-            print(f"  {key}: {value}")
+    banner("OPTIMIZATION COMPLETE")
+    print_result(result)
 
     return result
 
 
-async def demo_query_rewrite():
+async def demo_query_rewrite(db_conn: str):
     """
     Demo: Query rewrite optimization
     """
-    print("\n" + "=" * 70)
-    print("DEMO: Query Rewrite Optimization")
-    print("=" * 70)
+    from src.agent import SQLOptimizationAgent
 
-    db_conn = os.environ.get("DB_CONNECTION")
-    if not db_conn:
-        print("Error: DB_CONNECTION environment variable not set")
-        sys.exit(1)
+    banner("DEMO: Query Rewrite Optimization")
 
     agent = SQLOptimizationAgent(
         max_iterations=5,
@@ -124,8 +93,7 @@ async def demo_query_rewrite():
     WHERE order_date > '2024-01-01'
     """
 
-    print(f"\nQuery: {query}")
-    print(f"Database: {db_conn}\n")
+    sys.stdout.write(f"\nQuery: {query}\nDatabase: {db_conn}\n\n")
 
     result = await agent.optimize_query(
         sql=query,
@@ -134,41 +102,65 @@ async def demo_query_rewrite():
         max_time_ms=10000,
     )
 
-    print("\n" + "=" * 70)
-    print("OPTIMIZATION COMPLETE")
-    print("=" * 70)
-    print(f"Success: {result['success']}")
-    print(f"Final Query:\n{result['final_query']}")
+    banner("OPTIMIZATION COMPLETE")
+    print_result(result)
 
     return result
 
 
 async def main():
     """Run all demos"""
+    # Load environment variables from .env file if present
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # dotenv is optional
+
     # Check for API key
     if not os.environ.get("ANTHROPIC_API_KEY"):
-        print("Error: ANTHROPIC_API_KEY environment variable not set")
-        print("   Get your key from: https://console.anthropic.com/")
+        sys.stdout.write(
+            "Error: ANTHROPIC_API_KEY environment variable not set\n"
+            "   Get your key from: https://console.anthropic.com/\n"
+        )
         sys.exit(1)
 
-    print("\n" + "=" * 70)
-    print("SQL OPTIMIZATION AGENT - AUTONOMOUS DEMO")
-    print("=" * 70)
+    # Read the connection once and hand it to each demo
+    db_conn = os.environ.get("DB_CONNECTION")
+    if not db_conn:
+        sys.stdout.write(
+            "Error: DB_CONNECTION environment variable not set\n"
+            "   Example: export DB_CONNECTION='postgresql://localhost:5432/testdb'\n"
+        )
+        sys.exit(1)
 
-    try:
-        # Run demo 1: Index optimization
-        await demo_index_optimization()
+    banner("SQL OPTIMIZATION AGENT - AUTONOMOUS DEMO")
 
-        # Optionally run demo 2: Query rewrite
-        # await demo_query_rewrite()
+    demos = [
+        demo_index_optimization,  # Demo 1: Index optimization
+        # demo_query_rewrite,     # Optionally demo 2: Query rewrite
+    ]
 
-    except KeyboardInterrupt:
+    try:
+        # Demos use independent agents, so their LLM and database
+        # round-trips can overlap
+        results = await asyncio.gather(
+            *(demo(db_conn) for demo in demos), return_exceptions=True
+        )
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("\n\nDemo interrupted by user")
-    except Exception as e:
-        print(f"\nError: {e}")
-        import traceback
-        traceback.print_exc()
+        return
+
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"\nError: {result}")
+            traceback.print_exception(result)
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -10,18 +10,56 @@ Supports multiple LLM providers: Anthropic (Claude), Groq, OpenRouter.
 __version__ = "0.1.0"
 __author__ = "sql_exenv Team"
 
-from .actions import Action, ActionType, Solution
-from .agent import SQLOptimizationAgent
-from .analyzer import Bottleneck, ExplainAnalyzer, Severity
-from .llm import (
-    BaseLLMClient,
-    LLMConfig,
-    LLMProvider,
-    LLMResponse,
-    create_llm_client,
-)
-from .schema_fetcher import SchemaFetcher
-from .semanticizer import SemanticTranslator
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .actions import Action, ActionType, Solution
+    from .agent import SQLOptimizationAgent
+    from .analyzer import Bottleneck, ExplainAnalyzer, Severity
+    from .llm import (
+        BaseLLMClient,
+        LLMConfig,
+        LLMProvider,
+        LLMResponse,
+        create_llm_client,
+    )
+    from .schema_fetcher import SchemaFetcher
+    from .semanticizer import SemanticTranslator
+
+# Public names are resolved on first access (PEP 562) so importing a light
+# submodule such as src.display doesn't pull in the agent, psycopg2 and
+# the LLM SDKs.
+_LAZY_EXPORTS = {
+    "Action": ".actions",
+    "ActionType": ".actions",
+    "Solution": ".actions",
+    "SQLOptimizationAgent": ".agent",
+    "Bottleneck": ".analyzer",
+    "ExplainAnalyzer": ".analyzer",
+    "Severity": ".analyzer",
+    "BaseLLMClient": ".llm",
+    "LLMConfig": ".llm",
+    "LLMProvider": ".llm",
+    "LLMResponse": ".llm",
+    "create_llm_client": ".llm",
+    "SchemaFetcher": ".schema_fetcher",
+    "SemanticTranslator": ".semanticizer",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 
 __all__ = [
     "ExplainAnalyzer",
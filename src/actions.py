@@ -4,6 +4,7 @@ Action Types for Autonomous SQL Optimization Agent
 Defines the action space for the agent's decision-making loop.
 """
 
+import json
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any
@@ -115,8 +116,6 @@ def parse_action_from_llm_response(response: str) -> Action:
     Raises:
         ValueError: If response format is invalid
     """
-    import json
-
     # Strip markdown code blocks if present
     response = response.strip()
     if response.startswith("```json"):
@@ -12,9 +12,12 @@ Architecture:
     5. Repeat: Until optimized or max iterations reached
 """
 
+import asyncio
 import json
 import re
+import time
 from dataclasses import dataclass, field
+from types import ModuleType
 from typing import Any
 
 import psycopg2
@@ -28,12 +31,32 @@ from .llm import BaseLLMClient, create_llm_client
 from .schema_fetcher import SchemaFetcher
 from .semanticizer import SemanticTranslator
 from .tools.hypopg import HypoPGTool
-from .validators.base import ValidationResult
+from .validators.base import ValidationIssue, ValidationResult
 from .validators.differential import NoRECValidator
 from .validators.metamorphic import TLPValidator
 
+orjson: ModuleType | None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+# Index name from a CREATE INDEX statement (tracked to avoid duplicates)
+_INDEX_NAME_RE = re.compile(
+    r'CREATE\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)',
+    re.IGNORECASE,
+)
+
+
+def _dumps_indented(obj: Any) -> str:
+    """json.dumps(obj, indent=2), using orjson when it is installed."""
+    if orjson is not None:
+        dumped: bytes = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        return dumped.decode()
+    return json.dumps(obj, indent=2)
+
+
+@dataclass(slots=True)
 class FailedAction:
     """
     Record of a failed optimization action.
@@ -47,7 +70,7 @@ class FailedAction:
     action: Action
     error: str
     iteration: int
-    timestamp: float = field(default_factory=lambda: __import__('time').time())
+    timestamp: float = field(default_factory=time.time)
 
 
 @dataclass
@@ -94,6 +117,23 @@ class SQLOptimizationAgent:
         ```
     """
 
+    # Error interpretation rules: (all of, any of, interpretation).
+    # Checked in order against the lowercased error; first match wins.
+    _ERROR_INTERPRETATIONS = (
+        (("already exists", "relation"), (),
+         "The index/table already exists. Try checking if it's being used, or create a different index."),
+        (("permission denied",), (),
+         "Permission denied. You may not have CREATE INDEX privileges on this table."),
+        (("syntax error",), (),
+         "SQL syntax error. Check the DDL statement format."),
+        ((), ("timeout", "canceling statement"),
+         "Query timeout. The operation took too long. Try a different optimization approach."),
+        (("lock",), ("timeout", "deadlock"),
+         "Lock/deadlock detected. The table may be in use. Try again or use CONCURRENTLY."),
+        (("does not exist", "relation"), (),
+         "Table/relation doesn't exist. Check table name spelling."),
+    )
+
     def __init__(
         self,
         max_iterations: int = 10,
@@ -161,14 +201,22 @@ class SQLOptimizationAgent:
         self.max_actions_without_improvement = 2  # Stop after N actions with no improvement
         self.min_improvement_threshold = 0.05     # 5% minimum improvement required
 
-        # Lazy-init schema fetcher (only created when needed)
-        self.schema_fetcher: SchemaFetcher | None = None
+        # Lazy-init schema fetchers, one per connection string so each
+        # database keeps its own schema cache across queries
+        self._schema_fetchers: dict[str, SchemaFetcher] = {}
 
         # Extension detection and tools (lazy-init per connection)
         self.extension_detector = ExtensionDetector()
         self.hypopg_tool: HypoPGTool | None = None
         self.can_use_hypopg: bool = False
 
+        # Detected extensions per connection string (reused across queries)
+        self._extensions_cache: dict[str, dict[str, str | None]] = {}
+
+        # EXPLAIN output for the current optimize_query call, keyed by
+        # (sql, db_connection, analyze threshold); cleared whenever DDL runs
+        self._plan_cache: dict[tuple[str, str, float], list[dict]] = {}
+
     async def optimize_query(
         self,
         sql: str,
@@ -179,6 +227,7 @@ class SQLOptimizationAgent:
         schema_info: str | None = None,
         auto_fetch_schema: bool = True,
         validate_correctness: bool = True,
+        skip_if_within_constraints: bool = False,
     ) -> dict[str, Any]:
         """
         Autonomously optimize a SQL query with optional correctness validation.
@@ -205,6 +254,9 @@ class SQLOptimizationAgent:
             schema_info: Optional database schema information (manual override)
             auto_fetch_schema: Automatically fetch schema from database (default: True)
             validate_correctness: Validate query correctness before optimization (default: True)
+            skip_if_within_constraints: Return without planning any action (and
+                without LLM calls) when the query already meets max_cost and
+                max_time_ms (default: False)
 
         Returns:
             Dictionary with optimization results:
@@ -219,8 +271,9 @@ class SQLOptimizationAgent:
         """
         current_query = sql.strip()
         actions_taken: list[Action] = []
+        # Plans from an earlier call may predate other sessions' changes
+        self._plan_cache.clear()
         failed_actions: list[FailedAction] = []
-        iteration = 0
 
         constraints = {
             "max_cost": max_cost,
@@ -228,22 +281,18 @@ class SQLOptimizationAgent:
             "analyze_cost_threshold": analyze_cost_threshold,
         }
 
-        # Auto-fetch schema if not provided
-        if auto_fetch_schema and schema_info is None:
-            try:
-                if self.schema_fetcher is None:
-                    self.schema_fetcher = SchemaFetcher(db_connection)
-                schema_info = self.schema_fetcher.fetch_schema_for_query(sql)
-                # Schema fetching details hidden for clean UI
-            except Exception:
-                # Schema fetching is optional - continue without it
-                schema_info = None
-
-        # Detect available extensions (hypopg for virtual index testing)
-        extensions = self.extension_detector.detect(db_connection)
+        # Auto-fetch schema (if not provided) and detect available extensions
+        # (hypopg for virtual index testing). Both are blocking psycopg2
+        # calls, so run them in a worker thread over one shared connection.
+        fetched_schema, extensions = await asyncio.to_thread(
+            self._preflight, sql, db_connection, auto_fetch_schema and schema_info is None
+        )
+        if schema_info is None:
+            schema_info = fetched_schema
         self.can_use_hypopg = self.extension_detector.has_hypopg(extensions)
         if self.can_use_hypopg:
-            self.hypopg_tool = HypoPGTool(db_connection)
+            if self.hypopg_tool is None or self.hypopg_tool.connection_string != db_connection:
+                self.hypopg_tool = HypoPGTool(db_connection)
             display.info("hypopg extension detected - virtual index testing enabled")
 
         # PHASE 1: CORRECTNESS VALIDATION (if enabled)
@@ -277,6 +326,30 @@ class SQLOptimizationAgent:
                 display.success(f"Correctness validated ({validation_result.method})")
 
         # PHASE 2: PERFORMANCE OPTIMIZATION
+        if skip_if_within_constraints:
+            # Cheap gate: EXPLAIN plus local analysis, no semantic translation.
+            # The plan is cached, so the loop's first EXPLAIN is free on a miss.
+            explain_result = await self._get_explain_plan(
+                current_query, db_connection, analyze_cost_threshold
+            )
+            # EXPLAIN (FORMAT JSON) returns a one-element list; analyze the plan dict
+            plan_metrics = self.analyzer.analyze(explain_result[0])
+            current_cost = plan_metrics["total_cost"]
+            current_time = plan_metrics.get("execution_time_ms", 0)
+            if current_cost <= max_cost and (current_time == 0 or current_time <= max_time_ms):
+                display.success("Query already meets constraints")
+                return {
+                    "success": True,
+                    "final_query": current_query,
+                    "actions": actions_taken,
+                    "metrics": {
+                        "final_cost": current_cost,
+                        "final_time_ms": current_time,
+                        "initial_cost": current_cost,
+                    },
+                    "reason": f"Cost {current_cost:.0f} is within the limit of {max_cost:.0f}"
+                }
+
         # ReAct Loop: Reason → Act → Observe
         # max_iterations is a safety mechanism only - agent decides when to stop
         iteration = 0
@@ -295,8 +368,13 @@ class SQLOptimizationAgent:
                     current_query, db_connection, constraints, schema_info
                 )
 
+            # Unpack once - these are read on every exit path below
+            plan_metrics = analysis["analysis"]
+            feedback = analysis["feedback"]
+
             # Track cost for improvement measurement
-            current_cost = analysis["analysis"]["total_cost"]
+            current_cost = plan_metrics["total_cost"]
+            current_time = plan_metrics.get("execution_time_ms", 0)
             if initial_cost is None:
                 initial_cost = current_cost
                 last_cost = current_cost
@@ -316,7 +394,7 @@ class SQLOptimizationAgent:
                             if len(exhausted_types) >= 2:  # At least 2 action types exhausted
                                 display.info(f"Stopping: exhausted {exhausted_types} without improvement")
                                 return {
-                                    "success": analysis["feedback"]["status"] == "pass",
+                                    "success": feedback["status"] == "pass",
                                     "final_query": current_query,
                                     "actions": actions_taken,
                                     "metrics": {
@@ -333,18 +411,18 @@ class SQLOptimizationAgent:
 
             # STEP 2: OBSERVE - Record current status but always try to optimize further
             # Only stop early if we've already taken actions AND constraints are met
-            if analysis["feedback"]["status"] == "pass" and len(actions_taken) > 0:
+            if feedback["status"] == "pass" and len(actions_taken) > 0:
                 display.success("Optimization complete")
                 return {
                     "success": True,
                     "final_query": current_query,
                     "actions": actions_taken,
                     "metrics": {
-                        "final_cost": analysis["analysis"]["total_cost"],
-                        "final_time_ms": analysis["analysis"].get("execution_time_ms", 0),
-                        "initial_cost": actions_taken[0].metrics.get("cost_before", 0) if actions_taken else analysis["analysis"]["total_cost"],
+                        "final_cost": current_cost,
+                        "final_time_ms": current_time,
+                        "initial_cost": actions_taken[0].metrics.get("cost_before", 0) if actions_taken else current_cost,
                     },
-                    "reason": analysis["feedback"]["reason"]
+                    "reason": feedback["reason"]
                 }
 
             # STEP 3: PLAN - Decide next action (always try to find optimizations)
@@ -355,8 +433,8 @@ class SQLOptimizationAgent:
             if action.type == ActionType.DONE:
                 # Agent decided optimization is complete
                 # Check if constraints are actually met
-                final_cost = analysis["analysis"]["total_cost"]
-                final_time = analysis["analysis"].get("execution_time_ms", 0)
+                final_cost = current_cost
+                final_time = current_time
                 meets_constraints = (
                     final_cost <= constraints["max_cost"] and
                     (final_time == 0 or final_time <= constraints["max_time_ms"])
@@ -392,7 +470,7 @@ class SQLOptimizationAgent:
 
             # Record metrics before action
             action.metrics = {
-                "cost_before": analysis["analysis"]["total_cost"],
+                "cost_before": current_cost,
                 "iteration": iteration,
             }
 
@@ -430,14 +508,14 @@ class SQLOptimizationAgent:
                     display.tool_result(action.type.value, "Index created (verified beneficial)")
                     # Track created index name to avoid duplicates
                     if action.ddl:
-                        match = re.search(r'CREATE\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', action.ddl, re.IGNORECASE)
+                        match = _INDEX_NAME_RE.search(action.ddl)
                         if match:
                             self.created_indexes.add(match.group(1).lower())
             elif action.type == ActionType.CREATE_INDEX:
                 display.tool_result(action.type.value, "Index created")
                 # Track created index name to avoid duplicates
                 if action.ddl:
-                    match = re.search(r'CREATE\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', action.ddl, re.IGNORECASE)
+                    match = _INDEX_NAME_RE.search(action.ddl)
                     if match:
                         self.created_indexes.add(match.group(1).lower())
             elif action.type == ActionType.RUN_ANALYZE:
@@ -464,6 +542,73 @@ class SQLOptimizationAgent:
             "reason": f"Reached max iterations ({self.max_iterations}). {final_analysis['feedback']['reason']}"
         }
 
+    def _preflight(
+        self,
+        sql: str,
+        db_connection: str,
+        fetch_schema: bool,
+    ) -> tuple[str | None, dict[str, str | None]]:
+        """
+        Detect extensions and fetch schema over a single connection.
+
+        Extensions are detected once per connection string and reused by
+        later queries; when nothing else is needed no connection is opened.
+        Falls back to the detector's own connection handling if the shared
+        connection can't be opened (schema is skipped in that case).
+
+        Args:
+            sql: SQL query to analyze
+            db_connection: PostgreSQL connection string
+            fetch_schema: Whether to fetch schema for the query's tables
+
+        Returns:
+            Tuple of (schema string or None, extensions dict)
+        """
+        extensions = self._extensions_cache.get(db_connection)
+        if extensions is not None and not fetch_schema:
+            return None, extensions
+
+        try:
+            conn = psycopg2.connect(db_connection)
+        except Exception:
+            return None, extensions or self.extension_detector.detect(db_connection)
+
+        try:
+            # Autocommit so a failed probe doesn't abort later queries
+            conn.autocommit = True
+            if extensions is None:
+                extensions = self.extension_detector.detect(db_connection, conn=conn)
+                self._extensions_cache[db_connection] = extensions
+            schema_info = None
+            if fetch_schema:
+                with conn.cursor() as cur:
+                    schema_info = self._fetch_schema(sql, db_connection, cur)
+            return schema_info, extensions
+        finally:
+            conn.close()
+
+    def _fetch_schema(self, sql: str, db_connection: str, cursor=None) -> str | None:
+        """
+        Fetch schema for the tables referenced in a query.
+
+        Args:
+            sql: SQL query to analyze
+            db_connection: PostgreSQL connection string
+            cursor: Optional open psycopg2 cursor to reuse
+
+        Returns:
+            Schema string, or None if fetching failed
+        """
+        try:
+            fetcher = self._schema_fetchers.get(db_connection)
+            if fetcher is None:
+                fetcher = self._schema_fetchers[db_connection] = SchemaFetcher(db_connection)
+            # Schema fetching details hidden for clean UI
+            return fetcher.fetch_schema_for_query(sql, cursor)
+        except Exception:
+            # Schema fetching is optional - continue without it
+            return None
+
     async def _validate_correctness(
         self,
         sql: str,
@@ -482,8 +627,6 @@ class SQLOptimizationAgent:
         Returns:
             Combined ValidationResult from TLP and NoREC validators
         """
-        import asyncio
-
         # Run TLP and NoREC validators in parallel for efficiency
         try:
             tlp_result, norec_result = await asyncio.gather(
@@ -493,7 +636,6 @@ class SQLOptimizationAgent:
             )
         except Exception as e:
             # If validation fails completely, return error result
-            from .validators.base import ValidationIssue
             return ValidationResult(
                 passed=False,
                 confidence=0.0,
@@ -617,42 +759,51 @@ class SQLOptimizationAgent:
         Phase 1: EXPLAIN (FORMAT JSON) - Estimate cost without execution
         Phase 2: EXPLAIN (ANALYZE, FORMAT JSON) - Full analysis if safe
 
-        Wraps EXPLAIN ANALYZE in transaction for safety per PostgreSQL best practices.
+        Both phases run in one transaction that is always rolled back, so
+        EXPLAIN ANALYZE has no side effects. The statement timeout is set
+        with SET LOCAL in the same round-trip as the first EXPLAIN.
 
         Args:
             sql: SQL query to explain
             db_connection: PostgreSQL connection string
             analyze_cost_threshold: Cost threshold for running EXPLAIN ANALYZE
 
+        Plans are reused when the same query is explained again with no DDL
+        in between (e.g. after a failed action or a rejected virtual index).
+
         Returns:
             EXPLAIN JSON output as list
         """
+        cache_key = (sql, db_connection, analyze_cost_threshold)
+        cached = self._plan_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         conn = psycopg2.connect(db_connection)
         cursor = conn.cursor()
 
         try:
-            # Set statement timeout for safety
-            cursor.execute(f"SET statement_timeout = {self.statement_timeout_ms}")
-
-            # Phase 1: Get estimated cost without execution
-            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            # Phase 1: Get estimated cost without execution. psycopg2 has
+            # already opened a transaction, so SET LOCAL scopes the timeout
+            # to it and both statements go out in a single round-trip.
+            cursor.execute(
+                f"SET LOCAL statement_timeout = {self.statement_timeout_ms}; "
+                f"EXPLAIN (FORMAT JSON) {sql}"
+            )
             result = cursor.fetchone()[0]
             estimated_cost = result[0]["Plan"]["Total Cost"]
 
             # Phase 2: Run EXPLAIN ANALYZE only if cost is below threshold
             if estimated_cost < analyze_cost_threshold:
-                # Wrap in transaction for safety (per PostgreSQL docs)
-                cursor.execute("BEGIN")
-                try:
-                    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
-                    result = cursor.fetchone()[0]
-                finally:
-                    cursor.execute("ROLLBACK")  # Always rollback to prevent side effects
+                cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+                result = cursor.fetchone()[0]
 
+            self._plan_cache[cache_key] = result
             return result
 
         finally:
             cursor.close()
+            conn.rollback()  # Always rollback to prevent side effects
             conn.close()
 
     async def _plan_action(
@@ -688,24 +839,29 @@ class SQLOptimizationAgent:
         # Format previous actions for context
         history = ""
         if previous_actions:
-            history = "\n\nSuccessful actions taken:\n"
-            for i, action in enumerate(previous_actions, 1):
-                history += f"{i}. {action.type.value}: {action.reasoning}\n"
+            history = "\n\nSuccessful actions taken:\n" + "".join(
+                f"{i}. {action.type.value}: {action.reasoning}\n"
+                for i, action in enumerate(previous_actions, 1)
+            )
 
         # Format failed actions with full error context using ErrorClassifier
         failure_context = ""
         if failed_actions:
-            failure_context = "\n\nFailed attempts (DO NOT RETRY THESE EXACT ACTIONS):\n"
+            parts = ["\n\nFailed attempts (DO NOT RETRY THESE EXACT ACTIONS):\n"]
+            append = parts.append
             for i, failed in enumerate(failed_actions, 1):
                 # Classify the error for structured guidance
                 error_classification = self.error_classifier.classify(failed.error)
+                failed_action = failed.action
 
-                failure_context += f"{i}. {failed.action.type.value}: {failed.action.reasoning}\n"
-                failure_context += f"   DDL: {failed.action.ddl}\n" if failed.action.ddl else ""
-                failure_context += f"   Error: {failed.error}\n"
-                failure_context += f"   → Error Category: {error_classification.category.value}\n"
-                failure_context += f"   → {error_classification.guidance}\n"
-                failure_context += f"   → {self.error_classifier.format_alternatives_for_llm(error_classification)}\n"
+                append(f"{i}. {failed_action.type.value}: {failed_action.reasoning}\n")
+                if failed_action.ddl:
+                    append(f"   DDL: {failed_action.ddl}\n")
+                append(f"   Error: {failed.error}\n")
+                append(f"   → Error Category: {error_classification.category.value}\n")
+                append(f"   → {error_classification.guidance}\n")
+                append(f"   → {self.error_classifier.format_alternatives_for_llm(error_classification)}\n")
+            failure_context = "".join(parts)
 
         # Build context about created indexes
         indexes_context = ""
@@ -744,7 +900,7 @@ Current performance analysis:
 - Current iteration: {iteration}
 
 Detected bottlenecks:
-{json.dumps(bottlenecks, indent=2)}
+{_dumps_indented(bottlenecks)}
 {indexes_context}
 {history}
 {failure_context}
@@ -896,8 +1052,18 @@ Choose FAILED when:
             display.warning("No query context - creating real index")
             return await self._execute_ddl(action.ddl, db_connection)
 
-        # Test the index virtually
-        result = self.hypopg_tool.test_index(current_query, action.ddl)
+        if action.ddl is not None and (
+            action.ddl in self.executed_ddls or action.ddl in self.failed_ddls
+        ):
+            # Outcome already known - skip the virtual test round-trips
+            return await self._execute_ddl(action.ddl, db_connection)
+
+        # Test the index virtually. The loop records this query's cost on the
+        # action just before acting, so the tool can skip its baseline EXPLAIN.
+        metrics = getattr(action, "metrics", None) or {}
+        result = self.hypopg_tool.test_index(
+            current_query, action.ddl, baseline_cost=metrics.get("cost_before")
+        )
 
         if result.error:
             return {
@@ -969,6 +1135,12 @@ Choose FAILED when:
                 conn.commit()
 
             self.executed_ddls.add(ddl)
+            # New indexes/statistics change plans
+            self._plan_cache.clear()
+            fetcher = self._schema_fetchers.get(db_connection)
+            if fetcher is not None:
+                # New indexes/columns make cached schemas stale
+                fetcher.invalidate_cache()
 
             return {"success": True, "message": "DDL executed successfully"}
 
@@ -993,29 +1165,11 @@ Choose FAILED when:
         """
         error_lower = error.lower()
 
-        # Index already exists
-        if "already exists" in error_lower and "relation" in error_lower:
-            return "The index/table already exists. Try checking if it's being used, or create a different index."
-
-        # Permission denied
-        if "permission denied" in error_lower:
-            return "Permission denied. You may not have CREATE INDEX privileges on this table."
-
-        # Syntax error
-        if "syntax error" in error_lower:
-            return "SQL syntax error. Check the DDL statement format."
-
-        # Timeout
-        if "timeout" in error_lower or "canceling statement" in error_lower:
-            return "Query timeout. The operation took too long. Try a different optimization approach."
-
-        # Lock timeout
-        if "lock" in error_lower and ("timeout" in error_lower or "deadlock" in error_lower):
-            return "Lock/deadlock detected. The table may be in use. Try again or use CONCURRENTLY."
-
-        # Table doesn't exist
-        if "does not exist" in error_lower and "relation" in error_lower:
-            return "Table/relation doesn't exist. Check table name spelling."
+        for all_of, any_of, interpretation in self._ERROR_INTERPRETATIONS:
+            if all(term in error_lower for term in all_of) and (
+                not any_of or any(term in error_lower for term in any_of)
+            ):
+                return interpretation
 
         # Generic fallback
         return "Unexpected error. Consider trying a different optimization strategy."
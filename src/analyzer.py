@@ -9,6 +9,7 @@ import json
 import re
 from dataclasses import dataclass
 from enum import Enum
+from types import ModuleType
 from typing import Any
 
 try:
@@ -16,6 +17,26 @@ try:
 except Exception:
     sqlparse = None
 
+orjson: ModuleType | None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# EXPLAIN JSON passed as text is parsed with orjson when it is installed
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Column name in a filter, ahead of a ::cast or = operator
+_FILTER_COLUMN_RE = re.compile(r'([a-zA-Z_][\w]*\.)?([a-zA-Z_][\w]*)\s*(?:::|\s*=)')
+# Every column compared in a filter: optional table prefix, optional cast, operator
+_FILTER_COMPARISON_RE = re.compile(
+    r'(?:([a-zA-Z_][\w]*)\.)?([a-zA-Z_][\w]*)\s*(?:::[a-zA-Z_][\w]*)?\s*(?:=|<|>|!=|<=|>=)'
+)
+# Equality between two (possibly qualified) columns in a join condition
+_JOIN_EQUALITY_RE = re.compile(r'([a-zA-Z_][\w\.]*)\s*=\s*([a-zA-Z_][\w\.]*)')
+# Operator keywords the comparison pattern can mistake for column names
+_FILTER_KEYWORDS = frozenset({'AND', 'OR', 'NOT', 'IN', 'LIKE', 'BETWEEN', 'IS', 'NULL'})
+
 
 class Severity(Enum):
     """Bottleneck severity levels."""
@@ -24,7 +45,11 @@ class Severity(Enum):
     LOW = "LOW"
 
 
-@dataclass
+# Bottleneck sort order, most severe first
+_SEVERITY_RANK = {Severity.HIGH: 0, Severity.MEDIUM: 1, Severity.LOW: 2}
+
+
+@dataclass(slots=True)
 class Bottleneck:
     """Represents a detected performance bottleneck."""
     node_type: str
@@ -84,7 +109,7 @@ class ExplainAnalyzer:
         """
         # Parse if string
         if isinstance(explain_output, str):
-            plan_data = json.loads(explain_output)
+            plan_data = _json_loads(explain_output)
         else:
             plan_data = explain_output
 
@@ -106,7 +131,7 @@ class ExplainAnalyzer:
 
         # Sort by severity
         bottlenecks.sort(key=lambda b: (
-            {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}[b.severity.value],
+            _SEVERITY_RANK[b.severity],
             -(b.cost or 0)
         ))
 
@@ -126,47 +151,47 @@ class ExplainAnalyzer:
         bottlenecks: list[Bottleneck]
     ) -> None:
         """
-        Recursively traverse plan tree and detect bottlenecks.
+        Traverse plan tree (pre-order) and detect bottlenecks.
+
+        Uses an explicit stack so deep plans don't hit the recursion limit.
 
         Args:
-            node: Current plan node
+            node: Root plan node
             total_cost: Total query cost (for percentage calculations)
             bottlenecks: List to append detected bottlenecks
         """
-        node_type = node.get('Node Type', 'Unknown')
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            node_type = node.get('Node Type', 'Unknown')
 
-        if node_type in ('Gather', 'Gather Merge'):
-            if 'Plans' in node:
-                for child in node['Plans']:
-                    self._traverse_plan(child, total_cost, bottlenecks)
-            return
+            # Gather nodes are pass-through - only their children are checked
+            if node_type not in ('Gather', 'Gather Merge'):
+                # Detection Rule 1: Sequential Scans on large tables
+                if node_type in ('Seq Scan', 'Parallel Seq Scan'):
+                    self._check_seq_scan(node, bottlenecks)
 
-        # Detection Rule 1: Sequential Scans on large tables
-        if node_type in ('Seq Scan', 'Parallel Seq Scan'):
-            self._check_seq_scan(node, bottlenecks)
+                # Detection Rule 2: High-cost nodes
+                self._check_high_cost(node, total_cost, bottlenecks)
 
-        # Detection Rule 2: High-cost nodes
-        self._check_high_cost(node, total_cost, bottlenecks)
+                # Detection Rule 3: Planner estimate errors
+                self._check_estimate_error(node, bottlenecks)
 
-        # Detection Rule 3: Planner estimate errors
-        self._check_estimate_error(node, bottlenecks)
+                # Detection Rule 4: Nested Loop Joins on large sets
+                if 'Nested Loop' in node_type:
+                    self._check_nested_loop(node, bottlenecks)
 
-        # Detection Rule 4: Nested Loop Joins on large sets
-        if 'Nested Loop' in node_type:
-            self._check_nested_loop(node, bottlenecks)
+                # Join key index suggestions
+                if 'Join' in node_type or 'Nested Loop' in node_type:
+                    self._check_join_indexes(node, bottlenecks)
 
-        # Join key index suggestions
-        if 'Join' in node_type or 'Nested Loop' in node_type:
-            self._check_join_indexes(node, bottlenecks)
+                # Detection Rule 5: Sort operations
+                if node_type == 'Sort':
+                    self._check_sort(node, bottlenecks)
 
-        # Detection Rule 5: Sort operations
-        if node_type == 'Sort':
-            self._check_sort(node, bottlenecks)
-
-        # Recurse into child plans
-        if 'Plans' in node:
-            for child in node['Plans']:
-                self._traverse_plan(child, total_cost, bottlenecks)
+            # Visit children next, first child first
+            if 'Plans' in node:
+                stack.extend(reversed(node['Plans']))
 
     def _check_seq_scan(self, node: dict, bottlenecks: list[Bottleneck]) -> None:
         """Detect problematic sequential scans."""
@@ -383,8 +408,7 @@ class ExplainAnalyzer:
 
         # Use regex to extract column name, handling type casts like ::text
         # Pattern matches: table.column or just column, before :: or = operator
-        import re
-        match = re.search(r'([a-zA-Z_][\w]*\.)?([a-zA-Z_][\w]*)\s*(?:::|\s*=)', clean_filter)
+        match = _FILTER_COLUMN_RE.search(clean_filter)
         if match:
             # Return the column name (group 2), not the table prefix (group 1)
             return match.group(2)
@@ -416,12 +440,10 @@ class ExplainAnalyzer:
         # Use regex to find all column references before comparison operators
         # Pattern: optional_table.column before =, <, >, etc.
         # This matches: table.col or just col, followed by whitespace and operator
-        sql_keywords = {'AND', 'OR', 'NOT', 'IN', 'LIKE', 'BETWEEN', 'IS', 'NULL'}
-
-        for match in re.finditer(r'(?:([a-zA-Z_][\w]*)\.)?([a-zA-Z_][\w]*)\s*(?:::[a-zA-Z_][\w]*)?\s*(?:=|<|>|!=|<=|>=)', clean_filter):
+        for match in _FILTER_COMPARISON_RE.finditer(clean_filter):
             col = match.group(2)  # Column name (without table prefix)
             # Filter out SQL keywords and duplicates
-            if col and col.upper() not in sql_keywords and col not in cols:
+            if col and col.upper() not in _FILTER_KEYWORDS and col not in cols:
                 cols.append(col)
 
         return (cols, conj)
@@ -429,15 +451,14 @@ class ExplainAnalyzer:
     def _extract_columns_for_alias(self, cond_text: str, alias: str | None) -> list[str]:
         if not cond_text:
             return []
+        cols: list[str] = []
         if alias:
-            cols: list[str] = []
             for m in re.finditer(r'\b' + re.escape(alias) + r'\.([a-zA-Z_][\w]*)\b', cond_text):
                 c = m.group(1)
                 if c not in cols:
                     cols.append(c)
             return cols
-        cols: list[str] = []
-        for m in re.finditer(r'([a-zA-Z_][\w\.]*)\s*=\s*([a-zA-Z_][\w\.]*)', cond_text):
+        for m in _JOIN_EQUALITY_RE.finditer(cond_text):
             left = m.group(1)
             if '.' in left:
                 left = left.split('.')[-1]
@@ -446,21 +467,22 @@ class ExplainAnalyzer:
         return cols
 
     def _find_base_relation(self, node: dict) -> tuple[str | None, str | None]:
-        if 'Relation Name' in node:
-            return node.get('Relation Name'), node.get('Alias')
-        for ch in node.get('Plans', []) or []:
-            rel, al = self._find_base_relation(ch)
-            if rel:
-                return rel, al
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if 'Relation Name' in node:
+                return node.get('Relation Name'), node.get('Alias')
+            stack.extend(reversed(node.get('Plans', []) or []))
         return None, None
 
     def _subtree_uses_index(self, node: dict) -> bool:
-        nt = node.get('Node Type', '')
-        if 'Index Scan' in nt or 'Bitmap Index Scan' in nt or 'Index Only Scan' in nt:
-            return True
-        for ch in node.get('Plans', []) or []:
-            if self._subtree_uses_index(ch):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            nt = node.get('Node Type', '')
+            if 'Index Scan' in nt or 'Bitmap Index Scan' in nt or 'Index Only Scan' in nt:
                 return True
+            stack.extend(node.get('Plans', []) or [])
         return False
 
     def _bottleneck_to_dict(self, bottleneck: Bottleneck) -> dict:
@@ -3,13 +3,19 @@ Clean, minimal display module for CLI output.
 Provides Claude Code-style formatting with spinners and tool call visualization.
 """
 
+import os
 import sys
 from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Any
 
 from yaspin import yaspin
 from yaspin.spinners import Spinners
 
+# Set by Display.muted() - a context variable, so it silences only the
+# asyncio task (and worker threads it starts) that set it
+_muted: ContextVar[bool] = ContextVar('display_muted', default=False)
+
 
 class Display:
     """Centralized display manager for clean CLI output."""
@@ -25,8 +31,26 @@ class Display:
     DIM = '\033[2m'
     RESET = '\033[0m'
 
-    def __init__(self):
-        self.current_spinner = None
+    _COLOR_ATTRS = ('CYAN', 'GREEN', 'YELLOW', 'RED', 'BLUE', 'MAGENTA', 'BOLD', 'DIM', 'RESET')
+
+    def __init__(self, color: bool | None = None):
+        """
+        Args:
+            color: Emit ANSI escapes. Defaults to on only when stdout is a
+                terminal and NO_COLOR is unset (https://no-color.org).
+        """
+        if color is None:
+            color = sys.stdout is not None and sys.stdout.isatty() and 'NO_COLOR' not in os.environ
+        if not color:
+            # Shadow the class-level codes so every format is a plain string
+            for name in self._COLOR_ATTRS:
+                setattr(self, name, '')
+        # Status indicators are fixed strings - build them once
+        self._status_indicators = {
+            "success": f"{self.GREEN}success{self.RESET}",
+            "failure": f"{self.RED}failure{self.RESET}",
+            "loading": f"{self.YELLOW}loading{self.RESET}",
+        }
 
     @contextmanager
     def spinner(self, status: str):
@@ -38,6 +62,9 @@ class Display:
                 # do work
                 pass
         """
+        if _muted.get():
+            yield None
+            return
         sp = yaspin(Spinners.dots, text=status, color="cyan")
         sp.start()
         try:
@@ -45,6 +72,25 @@ class Display:
         finally:
             sp.stop()
 
+    @contextmanager
+    def muted(self):
+        """
+        Suppress all display output from the current context.
+
+        Used to run an agent in a background task without its progress
+        lines and spinner interleaving with other output.
+        """
+        token = _muted.set(True)
+        try:
+            yield
+        finally:
+            _muted.reset(token)
+
+    def _print(self, text: str = ""):
+        """Print a line unless output is muted in the current context."""
+        if not _muted.get():
+            print(text)
+
     def tool_call(self, tool_name: str, params: dict[str, Any] | None = None):
         """
         Display a tool call in Claude Code style.
@@ -54,7 +100,7 @@ class Display:
               query: "SELECT * FROM users..."
               mode: "performance"
         """
-        print(f"\n{self.CYAN}⚡ Using {tool_name}{self.RESET}")
+        lines = [f"\n{self.CYAN}⚡ Using {tool_name}{self.RESET}"]
 
         if params:
             for key, value in params.items():
@@ -62,7 +108,9 @@ class Display:
                 str_value = str(value)
                 if len(str_value) > 60:
                     str_value = str_value[:57] + "..."
-                print(f"  {self.DIM}{key}: {str_value}{self.RESET}")
+                lines.append(f"  {self.DIM}{key}: {str_value}{self.RESET}")
+
+        self._print("\n".join(lines))
 
     def tool_result(self, tool_name: str, summary: str, details: str | None = None):
         """
@@ -72,27 +120,29 @@ class Display:
             ✓ Analysis complete
               Found 3 optimization opportunities
         """
-        print(f"{self.GREEN}✓ {summary}{self.RESET}")
+        lines = [f"{self.GREEN}✓ {summary}{self.RESET}"]
         if details:
-            for line in details.split('\n'):
-                if line.strip():
-                    print(f"  {self.DIM}{line}{self.RESET}")
+            lines.extend(
+                f"  {self.DIM}{line}{self.RESET}"
+                for line in details.split('\n') if line.strip()
+            )
+        self._print("\n".join(lines))
 
     def info(self, message: str):
         """Display an info message."""
-        print(f"{self.CYAN}ℹ {message}{self.RESET}")
+        self._print(f"{self.CYAN}ℹ {message}{self.RESET}")
 
     def success(self, message: str):
         """Display a success message."""
-        print(f"{self.GREEN}✓ {message}{self.RESET}")
+        self._print(f"{self.GREEN}✓ {message}{self.RESET}")
 
     def warning(self, message: str):
         """Display a warning message."""
-        print(f"{self.YELLOW}⚠ {message}{self.RESET}")
+        self._print(f"{self.YELLOW}⚠ {message}{self.RESET}")
 
     def error(self, message: str):
         """Display an error message."""
-        print(f"{self.RED}✗ {message}{self.RESET}")
+        self._print(f"{self.RED}✗ {message}{self.RESET}")
 
     def section(self, title: str, content: str, code_block: bool = False):
         """
@@ -103,31 +153,30 @@ class Display:
             content: Section content
             code_block: If True, wraps content in SQL code block styling
         """
-        print(f"\n{self.BOLD}{self.BLUE}## {title}{self.RESET}\n")
+        heading = f"\n{self.BOLD}{self.BLUE}## {title}{self.RESET}\n"
 
         if code_block:
             # Display as code block
-            print(f"{self.DIM}```sql{self.RESET}")
-            for line in content.split('\n'):
-                print(f"{self.CYAN}{line}{self.RESET}")
-            print(f"{self.DIM}```{self.RESET}\n")
+            self._print(f"{heading}\n{self._format_code_block(content, 'sql')}")
         else:
-            print(content)
+            self._print(f"{heading}\n{content}")
 
     def header(self, text: str):
         """Display a header."""
-        print(f"\n{self.BOLD}{self.BLUE}# {text}{self.RESET}\n")
+        self._print(f"\n{self.BOLD}{self.BLUE}# {text}{self.RESET}\n")
 
     def subheader(self, text: str):
         """Display a subheader."""
-        print(f"\n{self.BOLD}## {text}{self.RESET}\n")
+        self._print(f"\n{self.BOLD}## {text}{self.RESET}\n")
 
     def code_block(self, code: str, language: str = "sql"):
         """Display a code block."""
-        print(f"{self.DIM}```{language}{self.RESET}")
-        for line in code.split('\n'):
-            print(f"{self.CYAN}{line}{self.RESET}")
-        print(f"{self.DIM}```{self.RESET}\n")
+        self._print(self._format_code_block(code, language))
+
+    def _format_code_block(self, code: str, language: str) -> str:
+        """Render a fenced, highlighted code block as one string."""
+        body = "\n".join(f"{self.CYAN}{line}{self.RESET}" for line in code.split('\n'))
+        return f"{self.DIM}```{language}{self.RESET}\n{body}\n{self.DIM}```{self.RESET}\n"
 
     def metric(self, label: str, value: str, improvement: str | None = None):
         """
@@ -137,13 +186,13 @@ class Display:
             Execution time: 245ms → 12ms (95% faster)
         """
         if improvement:
-            print(f"{self.DIM}{label}:{self.RESET} {value} {self.GREEN}{improvement}{self.RESET}")
+            self._print(f"{self.DIM}{label}:{self.RESET} {value} {self.GREEN}{improvement}{self.RESET}")
         else:
-            print(f"{self.DIM}{label}:{self.RESET} {value}")
+            self._print(f"{self.DIM}{label}:{self.RESET} {value}")
 
     def divider(self):
         """Display a subtle divider (not a heavy separator)."""
-        print(f"{self.DIM}{'─' * 50}{self.RESET}")
+        self._print(f"{self.DIM}{'─' * 50}{self.RESET}")
 
     def status_line(self, label: str, value: str, status: str = "success"):
         """
@@ -154,25 +203,22 @@ class Display:
             value: The value to display
             status: One of "success", "failure", "loading"
         """
-        if status == "success":
-            indicator = f"{self.GREEN}success{self.RESET}"
-        elif status == "failure":
-            indicator = f"{self.RED}failure{self.RESET}"
-        elif status == "loading":
-            indicator = f"{self.YELLOW}loading{self.RESET}"
-        else:
+        indicator = self._status_indicators.get(status)
+        if indicator is None:
             indicator = f"{self.DIM}{status}{self.RESET}"
 
-        print(f"  {self.DIM}{label}:{self.RESET} {value} \\\\ {indicator}")
+        self._print(f"  {self.DIM}{label}:{self.RESET} {value} \\\\ {indicator}")
 
     def clear_line(self):
         """Clear the current line."""
+        if _muted.get():
+            return
         sys.stdout.write('\r\033[K')
         sys.stdout.flush()
 
     def newline(self):
         """Print a blank line for spacing."""
-        print()
+        self._print()
 
 
 # Global display instance
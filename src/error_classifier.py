@@ -39,7 +39,7 @@ class AlternativeStrategy(Enum):
     MARK_FAILED = "MARK_FAILED"
 
 
-@dataclass
+@dataclass(slots=True)
 class ErrorClassification:
     """
     Result of classifying a PostgreSQL error.
@@ -64,6 +64,19 @@ class ErrorClassifier:
     for LLM agents to make better decisions after failures.
     """
 
+    # Descriptions shown to the LLM for each alternative strategy
+    STRATEGY_DESCRIPTIONS = {
+        AlternativeStrategy.QUERY_REWRITE: "Rewrite the query to avoid the problematic operation",
+        AlternativeStrategy.CHECK_INDEX_USAGE: "Check if the existing index is being used in the query plan",
+        AlternativeStrategy.CREATE_DIFFERENT_INDEX: "Create a different index (e.g., composite, partial, or on different columns)",
+        AlternativeStrategy.USE_CONCURRENT_INDEX: "Use CREATE INDEX CONCURRENTLY to avoid blocking",
+        AlternativeStrategy.INCREASE_WORK_MEM: "Increase work_mem to handle larger operations",
+        AlternativeStrategy.RUN_VACUUM: "Run VACUUM to free up disk space",
+        AlternativeStrategy.ANALYZE_STATISTICS: "Run ANALYZE to update table statistics",
+        AlternativeStrategy.MARK_DONE: "Accept current state and mark optimization as complete",
+        AlternativeStrategy.MARK_FAILED: "Acknowledge failure and stop optimization attempts"
+    }
+
     # Error pattern definitions with priorities (lower = higher priority)
     ERROR_PATTERNS = [
         # Priority 1: Specific errors that need exact matches
@@ -214,21 +227,9 @@ class ErrorClassifier:
         Returns:
             Formatted string of alternatives with descriptions
         """
-        strategy_descriptions = {
-            AlternativeStrategy.QUERY_REWRITE: "Rewrite the query to avoid the problematic operation",
-            AlternativeStrategy.CHECK_INDEX_USAGE: "Check if the existing index is being used in the query plan",
-            AlternativeStrategy.CREATE_DIFFERENT_INDEX: "Create a different index (e.g., composite, partial, or on different columns)",
-            AlternativeStrategy.USE_CONCURRENT_INDEX: "Use CREATE INDEX CONCURRENTLY to avoid blocking",
-            AlternativeStrategy.INCREASE_WORK_MEM: "Increase work_mem to handle larger operations",
-            AlternativeStrategy.RUN_VACUUM: "Run VACUUM to free up disk space",
-            AlternativeStrategy.ANALYZE_STATISTICS: "Run ANALYZE to update table statistics",
-            AlternativeStrategy.MARK_DONE: "Accept current state and mark optimization as complete",
-            AlternativeStrategy.MARK_FAILED: "Acknowledge failure and stop optimization attempts"
-        }
-
         lines = ["Suggested alternative strategies:"]
         for i, strategy in enumerate(classification.alternatives, 1):
-            desc = strategy_descriptions.get(strategy, strategy.value)
+            desc = self.STRATEGY_DESCRIPTIONS.get(strategy, strategy.value)
             lines.append(f"  {i}. {strategy.value}: {desc}")
 
         return "\n".join(lines)
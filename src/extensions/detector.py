@@ -14,20 +14,25 @@ class ExtensionDetector:
     # Only include extensions we actually use
     SUPPORTED_EXTENSIONS = ["hypopg"]
 
-    def detect(self, connection_string: str) -> dict[str, str | None]:
+    def detect(self, connection_string: str, conn=None) -> dict[str, str | None]:
         """
         Check which extensions are available and loaded.
 
         Returns dict of extension_name -> version (or None if not installed/loaded).
         Handles permission errors gracefully by returning empty dict.
+
+        An already-open autocommit connection may be passed as ``conn`` to
+        avoid a second handshake; it is left open for the caller.
         """
         extensions: dict[str, str | None] = {}
 
-        try:
-            conn = psycopg2.connect(connection_string)
-        except Exception:
-            # Can't connect - return empty (no extensions available)
-            return extensions
+        owns_conn = conn is None
+        if owns_conn:
+            try:
+                conn = psycopg2.connect(connection_string)
+            except Exception:
+                # Can't connect - return empty (no extensions available)
+                return extensions
 
         try:
             with conn.cursor() as cur:
@@ -54,7 +59,8 @@ class ExtensionDetector:
                         # Extension installed but not loaded
                         extensions["hypopg"] = None
         finally:
-            conn.close()
+            if owns_conn:
+                conn.close()
 
         return extensions
 
@@ -8,12 +8,17 @@ Automatically handles extended thinking for Claude and chain-of-thought fallback
 import copy
 import logging
 import os
+import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Chain-of-thought sections in non-Claude responses
+_THINKING_RE = re.compile(r"<thinking>(.*?)</thinking>", re.DOTALL)
+_ANSWER_RE = re.compile(r"<answer>(.*?)</answer>", re.DOTALL)
+
 
 class LLMProvider(Enum):
     """Supported LLM providers."""
@@ -224,10 +229,8 @@ Structure your response as:
 
     def _extract_cot_thinking(self, content: str) -> tuple[str | None, str]:
         """Extract thinking from chain-of-thought response."""
-        import re
-
-        thinking_match = re.search(r"<thinking>(.*?)</thinking>", content, re.DOTALL)
-        answer_match = re.search(r"<answer>(.*?)</answer>", content, re.DOTALL)
+        thinking_match = _THINKING_RE.search(content)
+        answer_match = _ANSWER_RE.search(content)
 
         thinking = thinking_match.group(1).strip() if thinking_match else None
         final_content = answer_match.group(1).strip() if answer_match else content
@@ -329,10 +332,8 @@ Structure your response as:
 
     def _extract_cot_thinking(self, content: str) -> tuple[str | None, str]:
         """Extract thinking from chain-of-thought response."""
-        import re
-
-        thinking_match = re.search(r"<thinking>(.*?)</thinking>", content, re.DOTALL)
-        answer_match = re.search(r"<answer>(.*?)</answer>", content, re.DOTALL)
+        thinking_match = _THINKING_RE.search(content)
+        answer_match = _ANSWER_RE.search(content)
 
         thinking = thinking_match.group(1).strip() if thinking_match else None
         final_content = answer_match.group(1).strip() if answer_match else content
@@ -5,11 +5,34 @@ Extracts schema metadata for SQL optimization agent.
 Fetches only the tables referenced in the SQL query to minimize context window usage.
 """
 
+import functools
+import time
 
 import psycopg2
-import sqlparse
-from sqlparse.sql import Identifier, IdentifierList
-from sqlparse.tokens import Keyword
+from sqlparse.sql import Function, Identifier, IdentifierList, Parenthesis
+from sqlparse.tokens import CTE, DML, Keyword
+
+from .sql_parse import parse_sql
+
+# Reserved words that can appear where a table name is expected
+_SQL_KEYWORDS = frozenset({
+    'SELECT', 'FROM', 'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL',
+    'OUTER', 'ON', 'AS', 'AND', 'OR', 'NOT', 'NULL', 'TRUE', 'FALSE',
+    'ORDER', 'BY', 'GROUP', 'HAVING', 'LIMIT', 'OFFSET', 'UNION', 'ALL',
+    'DISTINCT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'WITH'
+})
+
+# Verbose PostgreSQL type names and their short forms, in match order
+_TYPE_ABBREVIATIONS = (
+    ('integer', 'int'),
+    ('bigint', 'bigint'),
+    ('smallint', 'smallint'),
+    ('character varying', 'varchar'),
+    ('timestamp without time zone', 'timestamp'),
+    ('timestamp with time zone', 'timestamptz'),
+    ('double precision', 'float8'),
+    ('real', 'float4'),
+)
 
 
 class SchemaFetcher:
@@ -22,6 +45,10 @@ class SchemaFetcher:
     3. Formatting in compact representation
     """
 
+    # Seconds a fetched table schema is reused; bounds staleness from DDL
+    # run outside the agent (the agent's own DDL invalidates immediately)
+    SCHEMA_CACHE_TTL_S = 60.0
+
     def __init__(self, db_connection: str, schema: str = 'public'):
         """
         Initialize schema fetcher.
@@ -33,33 +60,63 @@ class SchemaFetcher:
         self.db_connection = db_connection
         self.schema = schema
 
-    def fetch_schema_for_query(self, sql: str) -> str:
+        # Interactive sessions resubmit variations of the same query, so
+        # memoize parsing and keep formatted schemas (table -> (fetched at,
+        # schema)) until DDL runs or SCHEMA_CACHE_TTL_S passes.
+        self._cached_table_names = functools.lru_cache(maxsize=128)(self._extract_table_names)
+        self._schema_cache: dict[str, tuple[float, str]] = {}
+
+    def invalidate_cache(self) -> None:
+        """Drop cached table schemas (call after DDL changes the database)."""
+        self._schema_cache.clear()
+
+    def fetch_schema_for_query(self, sql: str, cursor=None) -> str:
         """
         Extract and fetch schema for tables referenced in SQL query.
 
         Args:
             sql: SQL query to analyze
+            cursor: Optional open psycopg2 cursor to reuse (a new
+                connection is opened when omitted)
 
         Returns:
             Minimal schema string optimized for LLM context window
         """
         try:
             # Extract table names from SQL
-            table_names = self._extract_table_names(sql)
+            table_names = self._cached_table_names(sql)
 
             if not table_names:
                 return ""
 
-            # Fetch schema for each table
-            schema_parts = []
-            for table in table_names:
+            # Only hit the database for tables not cached recently
+            now = time.monotonic()
+            schemas: dict[str, str] = {}
+            for t in table_names:
+                cached = self._schema_cache.get(t)
+                if cached is not None and now - cached[0] < self.SCHEMA_CACHE_TTL_S:
+                    schemas[t] = cached[1]
+            missing = [t for t in table_names if t not in schemas]
+
+            if missing:
+                # Fetch schema for all missing tables over a single connection
+                conn = psycopg2.connect(self.db_connection) if cursor is None else None
                 try:
-                    schema_part = self._fetch_table_schema(table)
-                    if schema_part:
-                        schema_parts.append(schema_part)
+                    if conn is not None:
+                        with conn.cursor() as cur:
+                            fetched = self._fetch_schemas(cur, missing)
+                    else:
+                        fetched = self._fetch_schemas(cursor, missing)
+                    self._schema_cache.update((t, (now, s)) for t, s in fetched.items())
                 except Exception as e:
-                    # Continue with other tables if one fails
-                    schema_parts.append(f"TABLE {table}: (error fetching schema: {str(e)})")
+                    # Batched lookup failed - report it against every table
+                    fetched = {t: f"TABLE {t}: (error fetching schema: {str(e)})" for t in missing}
+                finally:
+                    if conn is not None:
+                        conn.close()
+                schemas.update(fetched)
+
+            schema_parts = [schemas[t] for t in table_names if schemas[t]]
 
             # Format as compact string
             return "\n\n".join(schema_parts)
@@ -87,15 +144,20 @@ class SchemaFetcher:
         """
         try:
             # Parse SQL
-            parsed = sqlparse.parse(sql)
+            parsed = parse_sql(sql)
             if not parsed:
                 return []
 
             tables: set[str] = set()
+            cte_names: set[str] = set()
 
             # Process each statement
             for statement in parsed:
                 tables.update(self._extract_from_statement(statement))
+                cte_names.update(self._extract_cte_names(statement))
+
+            # CTE names are referenced like tables but don't exist in the catalog
+            tables -= cte_names
 
             # Return as sorted list (deterministic order for testing)
             return sorted(tables)
@@ -122,11 +184,6 @@ class SchemaFetcher:
             if token.is_whitespace:
                 continue
 
-            # Handle CTEs (WITH clause)
-            if token.ttype is Keyword and token.value.upper() == 'WITH':
-                # Extract tables from CTE definitions
-                tables.update(self._extract_from_cte(statement))
-
             # Look for FROM keyword
             if token.ttype is Keyword and token.value.upper() == 'FROM':
                 from_seen = True
@@ -168,25 +225,50 @@ class SchemaFetcher:
 
         return tables
 
-    def _extract_from_cte(self, statement) -> set[str]:
+    def _extract_cte_names(self, statement) -> set[str]:
         """
-        Extract table names from CTE (WITH clause).
+        Extract names defined by a leading WITH clause.
 
         Args:
             statement: sqlparse Statement object
 
         Returns:
-            Set of table names from CTE definitions
+            Set of CTE names
         """
-        tables: set[str] = set()
+        names: set[str] = set()
+        in_with = False
 
-        # Find the WITH clause and extract tables from its subqueries
         for token in statement.tokens:
-            if token.is_group:
-                # Recursively extract from nested groups
-                tables.update(self._extract_from_statement(token))
+            if token.is_whitespace:
+                continue
 
-        return tables
+            if token.ttype is CTE:
+                in_with = True
+                continue
+
+            if not in_with:
+                continue
+
+            # Main statement starts - no more CTE definitions
+            if token.ttype is DML:
+                break
+
+            if isinstance(token, IdentifierList):
+                identifiers = token.get_identifiers()
+            elif isinstance(token, Identifier):
+                identifiers = [token]
+            else:
+                continue
+
+            for identifier in identifiers:
+                first = identifier.token_first()
+                # "name(col, ...) AS (...)" parses the name and column list as a Function
+                raw = first.get_name() if isinstance(first, Function) else first.value
+                name = self._clean_table_name(raw)
+                if name:
+                    names.add(name)
+
+        return names
 
     def _extract_table_name(self, identifier) -> str | None:
         """
@@ -198,6 +280,11 @@ class SchemaFetcher:
         Returns:
             Clean table name without schema prefix or alias
         """
+        # Derived tables: "(SELECT ...) sub" - the alias is not a table,
+        # tables inside are picked up when the group is recursed into
+        if isinstance(identifier.token_first(), Parenthesis):
+            return None
+
         # Get the real name (first part before alias)
         name = identifier.get_real_name()
 
@@ -247,15 +334,9 @@ class SchemaFetcher:
         Returns:
             True if word is a SQL keyword
         """
-        keywords = {
-            'SELECT', 'FROM', 'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL',
-            'OUTER', 'ON', 'AS', 'AND', 'OR', 'NOT', 'NULL', 'TRUE', 'FALSE',
-            'ORDER', 'BY', 'GROUP', 'HAVING', 'LIMIT', 'OFFSET', 'UNION', 'ALL',
-            'DISTINCT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'WITH'
-        }
-        return word.upper() in keywords
+        return word.upper() in _SQL_KEYWORDS
 
-    def _fetch_table_schema(self, table_name: str) -> str:
+    def _fetch_table_schema(self, table_name: str, cursor=None) -> str:
         """
         Fetch schema for a single table from PostgreSQL.
 
@@ -266,126 +347,160 @@ class SchemaFetcher:
 
         Args:
             table_name: Name of table to fetch schema for
+            cursor: Optional open psycopg2 cursor to reuse (a new
+                connection is opened when omitted)
 
         Returns:
             Formatted schema string in minimal format
         """
         try:
-            conn = psycopg2.connect(self.db_connection)
+            if cursor is None:
+                conn = psycopg2.connect(self.db_connection)
+                try:
+                    with conn:
+                        with conn.cursor() as cur:
+                            return self._fetch_schemas(cur, [table_name])[table_name]
+                finally:
+                    conn.close()
 
-            with conn:
-                with conn.cursor() as cur:
-                    # Fetch columns
-                    columns = self._fetch_columns(cur, table_name)
+            return self._fetch_schemas(cursor, [table_name])[table_name]
 
-                    # Fetch indexes
-                    indexes = self._fetch_indexes(cur, table_name)
+        except Exception as e:
+            # Return minimal error info
+            return f"TABLE {table_name}: (error: {str(e)})"
 
-                    # Fetch foreign keys
-                    foreign_keys = self._fetch_foreign_keys(cur, table_name)
+    def _fetch_schemas(self, cursor, table_names: list[str]) -> dict[str, str]:
+        """
+        Fetch and format schemas for several tables in one batch.
 
-            conn.close()
+        Issues one query each for columns, indexes and foreign keys
+        (filtered with ``= ANY(%s)``) instead of three per table.
 
-            # Format schema in minimal representation
-            return self._format_schema(table_name, columns, indexes, foreign_keys)
+        Args:
+            cursor: psycopg2 cursor
+            table_names: Table names to fetch
 
-        except Exception as e:
-            # Return minimal error info
-            return f"TABLE {table_name}: (error: {str(e)})"
+        Returns:
+            Dict mapping table name to formatted schema string
+        """
+        columns = self._group_by_table(self._fetch_columns(cursor, table_names))
+        indexes = self._group_by_table(self._fetch_indexes(cursor, table_names))
+        foreign_keys = self._group_by_table(self._fetch_foreign_keys(cursor, table_names))
+
+        return {
+            table: self._format_schema(
+                table,
+                columns.get(table, []),
+                indexes.get(table, []),
+                foreign_keys.get(table, []),
+            )
+            for table in table_names
+        }
 
-    def _fetch_columns(self, cursor, table_name: str) -> list[tuple]:
+    @staticmethod
+    def _group_by_table(rows: list[tuple]) -> dict[str, list[tuple]]:
+        """Group rows whose first column is the table name, dropping that column."""
+        grouped: dict[str, list[tuple]] = {}
+        for row in rows:
+            grouped.setdefault(row[0], []).append(tuple(row[1:]))
+        return grouped
+
+    def _fetch_columns(self, cursor, table_names: list[str]) -> list[tuple]:
         """
-        Fetch column information from information_schema.
+        Fetch column information from pg_catalog.
+
+        Reads pg_attribute directly rather than the information_schema.columns
+        view, which layers many joins and privilege checks over the catalogs.
 
         Args:
             cursor: psycopg2 cursor
-            table_name: Table name
+            table_names: Table names
 
         Returns:
-            List of (column_name, data_type, is_nullable, full_type) tuples
+            List of (table_name, column_name, data_type, is_nullable, full_type) tuples
         """
         query = """
             SELECT
-                c.column_name,
-                c.data_type,
-                c.is_nullable,
-                CASE
-                    WHEN c.character_maximum_length IS NOT NULL
-                    THEN c.data_type || '(' || c.character_maximum_length || ')'
-                    WHEN c.numeric_precision IS NOT NULL
-                    THEN c.data_type || '(' || c.numeric_precision ||
-                         COALESCE(',' || c.numeric_scale, '') || ')'
-                    ELSE c.data_type
-                END as full_type
-            FROM information_schema.columns c
-            WHERE c.table_schema = %s
-              AND c.table_name = %s
-            ORDER BY c.ordinal_position;
-        """
-
-        cursor.execute(query, (self.schema, table_name))
+                c.relname,
+                a.attname,
+                format_type(a.atttypid, NULL),
+                CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END,
+                format_type(a.atttypid, a.atttypmod) AS full_type
+            FROM pg_catalog.pg_attribute a
+            JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s
+              AND c.relname = ANY(%s)
+              AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+              AND a.attnum > 0
+              AND NOT a.attisdropped
+            ORDER BY c.relname, a.attnum;
+        """
+
+        cursor.execute(query, (self.schema, list(table_names)))
         return cursor.fetchall()
 
-    def _fetch_indexes(self, cursor, table_name: str) -> list[tuple]:
+    def _fetch_indexes(self, cursor, table_names: list[str]) -> list[tuple]:
         """
         Fetch index information from pg_indexes.
 
         Args:
             cursor: psycopg2 cursor
-            table_name: Table name
+            table_names: Table names
 
         Returns:
-            List of (index_name, index_definition) tuples
+            List of (table_name, index_name, index_definition) tuples
         """
         query = """
             SELECT
+                tablename,
                 indexname,
                 indexdef
             FROM pg_indexes
             WHERE schemaname = %s
-              AND tablename = %s
-            ORDER BY indexname;
+              AND tablename = ANY(%s)
+            ORDER BY tablename, indexname;
         """
 
-        cursor.execute(query, (self.schema, table_name))
+        cursor.execute(query, (self.schema, list(table_names)))
         return cursor.fetchall()
 
-    def _fetch_foreign_keys(self, cursor, table_name: str) -> list[tuple]:
+    def _fetch_foreign_keys(self, cursor, table_names: list[str]) -> list[tuple]:
         """
-        Fetch foreign key relationships from information_schema.
+        Fetch foreign key relationships from pg_catalog.
+
+        Reads pg_constraint directly; conkey/confkey are unnested in pairs so
+        multi-column keys map each column to its referenced column.
 
         Args:
             cursor: psycopg2 cursor
-            table_name: Table name
+            table_names: Table names
 
         Returns:
-            List of (column_name, referenced_table, referenced_column) tuples
+            List of (table_name, column_name, referenced_table, referenced_column) tuples
         """
         query = """
             SELECT
-                kcu.column_name,
-                rel_tco.table_name AS referenced_table,
-                rel_kcu.column_name AS referenced_column
-            FROM information_schema.table_constraints tco
-            JOIN information_schema.key_column_usage kcu
-              ON tco.constraint_name = kcu.constraint_name
-              AND tco.table_schema = kcu.table_schema
-            JOIN information_schema.referential_constraints rco
-              ON tco.constraint_name = rco.constraint_name
-              AND tco.table_schema = rco.constraint_schema
-            JOIN information_schema.table_constraints rel_tco
-              ON rco.unique_constraint_name = rel_tco.constraint_name
-              AND rco.unique_constraint_schema = rel_tco.table_schema
-            JOIN information_schema.key_column_usage rel_kcu
-              ON rel_tco.constraint_name = rel_kcu.constraint_name
-              AND rel_tco.table_schema = rel_kcu.table_schema
-            WHERE tco.constraint_type = 'FOREIGN KEY'
-              AND kcu.table_schema = %s
-              AND kcu.table_name = %s
-            ORDER BY kcu.column_name;
-        """
-
-        cursor.execute(query, (self.schema, table_name))
+                c.relname,
+                a.attname,
+                rc.relname AS referenced_table,
+                ra.attname AS referenced_column
+            FROM pg_catalog.pg_constraint con
+            JOIN pg_catalog.pg_class c ON c.oid = con.conrelid
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_catalog.pg_class rc ON rc.oid = con.confrelid
+            CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, ref_attnum)
+            JOIN pg_catalog.pg_attribute a
+              ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+            JOIN pg_catalog.pg_attribute ra
+              ON ra.attrelid = con.confrelid AND ra.attnum = k.ref_attnum
+            WHERE con.contype = 'f'
+              AND n.nspname = %s
+              AND c.relname = ANY(%s)
+            ORDER BY c.relname, a.attname;
+        """
+
+        cursor.execute(query, (self.schema, list(table_names)))
         return cursor.fetchall()
 
     def _format_schema(
@@ -473,20 +588,8 @@ class SchemaFetcher:
         Returns:
             Shortened type string
         """
-        # Map verbose types to short versions
-        type_map = {
-            'integer': 'int',
-            'bigint': 'bigint',
-            'smallint': 'smallint',
-            'character varying': 'varchar',
-            'timestamp without time zone': 'timestamp',
-            'timestamp with time zone': 'timestamptz',
-            'double precision': 'float8',
-            'real': 'float4',
-        }
-
         # Check for exact match
-        for long_type, short_type in type_map.items():
+        for long_type, short_type in _TYPE_ABBREVIATIONS:
             if type_str.startswith(long_type):
                 # Preserve length specifiers: character varying(255) -> varchar(255)
                 return type_str.replace(long_type, short_type)
@@ -9,11 +9,15 @@ Uses LLM to convert complex metrics into simple instructions like:
 """
 
 import json
+import re
 from typing import TYPE_CHECKING, Any, Optional
 
 if TYPE_CHECKING:
     from .llm import BaseLLMClient
 
+# "ON table (cols)" portion of a CREATE INDEX suggestion
+_INDEX_TARGET_RE = re.compile(r'ON\s+(\w+)\s*\(([^)]+)\)')
+
 
 class SemanticTranslator:
     """
@@ -296,9 +300,8 @@ Now analyze the data above and respond with ONLY JSON:"""
         # If LLM has a CREATE INDEX but it differs significantly from analyzer, use analyzer's
         if analyzer_suggestion and 'CREATE INDEX' in llm_suggestion:
             # Extract table and column info from both
-            import re
-            analyzer_parts = re.findall(r'ON\s+(\w+)\s*\(([^)]+)\)', analyzer_suggestion)
-            llm_parts = re.findall(r'ON\s+(\w+)\s*\(([^)]+)\)', llm_suggestion)
+            analyzer_parts = _INDEX_TARGET_RE.findall(analyzer_suggestion)
+            llm_parts = _INDEX_TARGET_RE.findall(llm_suggestion)
 
             if analyzer_parts and llm_parts:
                 analyzer_table, analyzer_cols = analyzer_parts[0]
@@ -0,0 +1,28 @@
+"""
+Shared, memoized sqlparse front end.
+
+The same SQL string is parsed by several components per optimization run
+(schema table extraction, TLP predicate extraction). Parsing once and
+sharing the token tree avoids repeating the work.
+"""
+
+import functools
+
+import sqlparse
+from sqlparse.sql import Statement
+
+
+@functools.lru_cache(maxsize=128)
+def parse_sql(sql: str) -> tuple[Statement, ...]:
+    """
+    Parse SQL into sqlparse statements, caching by SQL text.
+
+    Callers must treat the returned token trees as read-only.
+
+    Args:
+        sql: SQL string
+
+    Returns:
+        Tuple of parsed statements
+    """
+    return tuple(sqlparse.parse(sql))
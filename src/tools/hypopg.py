@@ -10,7 +10,7 @@ from typing import Any
 import psycopg2
 
 
-@dataclass
+@dataclass(slots=True)
 class HypoIndexResult:
     """Result of testing a hypothetical index."""
 
@@ -44,13 +44,17 @@ class HypoPGTool:
     def __init__(self, connection_string: str):
         self.connection_string = connection_string
 
-    def test_index(self, query: str, index_def: str) -> HypoIndexResult:
+    def test_index(
+        self, query: str, index_def: str, baseline_cost: float | None = None
+    ) -> HypoIndexResult:
         """
         Test if a proposed index would be used and its impact.
 
         Args:
             query: The SQL query to optimize
             index_def: CREATE INDEX statement to test
+            baseline_cost: Query cost without the index, if the caller already
+                has it (skips the baseline EXPLAIN round-trip)
 
         Returns:
             HypoIndexResult with cost comparison and usage info
@@ -72,12 +76,15 @@ class HypoPGTool:
         try:
             with conn.cursor() as cur:
                 # Get baseline cost
-                cur.execute(f"EXPLAIN (FORMAT JSON) {query}")
-                baseline = cur.fetchone()[0][0]
-                cost_before = baseline["Plan"]["Total Cost"]
+                if baseline_cost is not None:
+                    cost_before = baseline_cost
+                else:
+                    cur.execute(f"EXPLAIN (FORMAT JSON) {query}")
+                    baseline = cur.fetchone()[0][0]
+                    cost_before = baseline["Plan"]["Total Cost"]
 
                 # Create hypothetical index
-                cur.execute(f"SELECT * FROM hypopg_create_index($${index_def}$$)")
+                cur.execute("SELECT * FROM hypopg_create_index(%s)", (index_def,))
                 result = cur.fetchone()
                 if result:
                     hypo_oid = result[0]
@@ -134,7 +141,7 @@ class HypoPGTool:
             if hypo_oid is not None:
                 try:
                     with conn.cursor() as cur:
-                        cur.execute(f"SELECT hypopg_drop_index({hypo_oid})")
+                        cur.execute("SELECT hypopg_drop_index(%s)", (hypo_oid,))
                 except Exception:
                     pass  # Best effort cleanup
             conn.close()
@@ -153,18 +160,20 @@ class HypoPGTool:
         return "; ".join(nodes) if nodes else "No index usage detected"
 
     def _find_index_nodes(self, node: dict, results: list[str] | None = None) -> list[str]:
-        """Recursively find index-related nodes in the plan."""
+        """Find index-related nodes in the plan (pre-order, iterative)."""
         if results is None:
             results = []
 
-        node_type = node.get("Node Type", "")
-        if "Index" in node_type:
-            index_name = node.get("Index Name", "N/A")
-            results.append(f"{node_type}: {index_name}")
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            node_type = node.get("Node Type", "")
+            if "Index" in node_type:
+                index_name = node.get("Index Name", "N/A")
+                results.append(f"{node_type}: {index_name}")
 
-        # Recurse into child plans
-        for child in node.get("Plans", []):
-            self._find_index_nodes(child, results)
+            # Visit child plans next, first child first
+            stack.extend(reversed(node.get("Plans", [])))
 
         return results
 
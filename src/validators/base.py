@@ -21,7 +21,7 @@ class IssueSeverity(Enum):
     INFO = "INFO"
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationIssue:
     """
     Represents a single correctness issue detected during validation.
@@ -24,6 +24,7 @@ Example:
 
 import re
 import time
+from types import ModuleType
 
 try:
     import psycopg2
@@ -34,6 +35,12 @@ except ImportError:
 from .base import CorrectnessValidator, ValidationIssue, ValidationResult
 from .result_comparator import ResultComparator
 
+sqlparse: ModuleType | None
+try:
+    import sqlparse
+except ImportError:
+    sqlparse = None
+
 
 class NoRECValidator(CorrectnessValidator):
     """
@@ -93,7 +100,14 @@ class NoRECValidator(CorrectnessValidator):
                 "DEPENDENCY_ERROR"
             )
 
-        start_time = time.time()
+        if not sqlparse:
+            return self._create_error_result(
+                "NoREC",
+                "sqlparse not installed. Install with: pip install sqlparse",
+                "DEPENDENCY_ERROR"
+            )
+
+        start_time = time.perf_counter()
 
         # Step 1: Generate non-optimizable variant
         try:
@@ -126,15 +140,9 @@ class NoRECValidator(CorrectnessValidator):
             cursor = conn.cursor()
 
             try:
-                # Execute optimized query
-                cursor.execute(query)
-                optimized_rows = cursor.fetchall()
-                optimized_count = len(optimized_rows)
-
-                # Execute non-optimized query
-                cursor.execute(non_opt_query)
-                non_opt_rows = cursor.fetchall()
-                non_opt_count = len(non_opt_rows)
+                # Execute optimized and non-optimized queries
+                optimized_count = self._count_rows(cursor, query)
+                non_opt_count = self._count_rows(cursor, non_opt_query)
 
             finally:
                 cursor.close()
@@ -147,7 +155,7 @@ class NoRECValidator(CorrectnessValidator):
                 "EXECUTION_ERROR"
             )
 
-        execution_time = (time.time() - start_time) * 1000
+        execution_time = (time.perf_counter() - start_time) * 1000
 
         # Step 3: Compare row counts
         if optimized_count != non_opt_count:
@@ -203,6 +211,27 @@ class NoRECValidator(CorrectnessValidator):
             }
         )
 
+    def _count_rows(self, cursor, query: str) -> int:
+        """
+        Count the rows a query returns without fetching them.
+
+        Only the counts are compared, so the query is wrapped in
+        SELECT count(*) and the rows never leave the server. Comments are
+        stripped first so a trailing `; -- note` can't leave the semicolon
+        inside the wrapper.
+
+        Args:
+            cursor: Open database cursor
+            query: SQL query to count
+
+        Returns:
+            Number of rows the query returns
+        """
+        text = sqlparse.format(query, strip_comments=True) if sqlparse else query
+        inner = text.strip().rstrip(';').rstrip()
+        cursor.execute(f"SELECT count(*) FROM (\n{inner}\n) AS norec_rows")
+        return int(cursor.fetchone()[0])
+
     def _generate_non_optimizable(self, query: str) -> str:
         """
         Generate non-optimizable query variant.
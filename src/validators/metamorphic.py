@@ -30,6 +30,8 @@ import time
 try:
     import sqlparse
     from sqlparse.sql import Where
+
+    from ..sql_parse import parse_sql
 except ImportError:
     sqlparse = None
 
@@ -113,7 +115,7 @@ class TLPValidator(CorrectnessValidator):
                 "DEPENDENCY_ERROR"
             )
 
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Step 1: Extract WHERE predicate
         predicate = self._extract_where_predicate(query)
@@ -182,7 +184,7 @@ class TLPValidator(CorrectnessValidator):
         # The union of all partitions equals ALL rows (no WHERE), which is different.
         matches = self.comparator.compare_result_sets(original_rows, true_rows)
 
-        execution_time = (time.time() - start_time) * 1000
+        execution_time = (time.perf_counter() - start_time) * 1000
 
         if not matches:
             # Original query doesn't match TRUE partition - indicates logic error
@@ -273,7 +275,7 @@ class TLPValidator(CorrectnessValidator):
             return None
 
         try:
-            parsed = sqlparse.parse(query)
+            parsed = parse_sql(query)
             if not parsed:
                 return None
 
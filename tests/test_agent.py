@@ -222,6 +222,91 @@ class TestAgentSafety:
         agent = SQLOptimizationAgent(llm_client=mock_llm_client)
         pass
 
+    @pytest.mark.asyncio
+    async def test_explain_sets_timeout_in_same_round_trip(self, mock_db_connection, mock_llm_client):
+        """statement_timeout should ride along with the first EXPLAIN and be rolled back."""
+        from src.agent import SQLOptimizationAgent
+
+        agent = SQLOptimizationAgent(llm_client=mock_llm_client, statement_timeout_ms=30000)
+
+        with patch('psycopg2.connect') as mock_connect:
+            mock_cursor = Mock()
+            mock_cursor.fetchone.return_value = [[{"Plan": {"Total Cost": 10.0}}]]
+            mock_connect.return_value.cursor.return_value = mock_cursor
+
+            await agent._get_explain_plan("SELECT 1", mock_db_connection, 1_000_000.0)
+
+            statements = [c.args[0] for c in mock_cursor.execute.call_args_list]
+            assert statements[0] == (
+                "SET LOCAL statement_timeout = 30000; EXPLAIN (FORMAT JSON) SELECT 1"
+            )
+            assert statements[1] == "EXPLAIN (ANALYZE, FORMAT JSON) SELECT 1"
+            mock_connect.return_value.rollback.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_explain_plan_reused_until_ddl(self, mock_db_connection, mock_llm_client):
+        """A repeated EXPLAIN should hit the plan cache until DDL changes the schema."""
+        from src.agent import SQLOptimizationAgent
+
+        agent = SQLOptimizationAgent(llm_client=mock_llm_client)
+
+        with patch('psycopg2.connect') as mock_connect:
+            mock_cursor = Mock()
+            mock_cursor.fetchone.return_value = [[{"Plan": {"Total Cost": 10.0}}]]
+            mock_connect.return_value.cursor.return_value = mock_cursor
+
+            first = await agent._get_explain_plan("SELECT 1", mock_db_connection, 1_000_000.0)
+            second = await agent._get_explain_plan("SELECT 1", mock_db_connection, 1_000_000.0)
+            assert first is second
+            assert mock_connect.call_count == 1
+
+            await agent._execute_ddl("CREATE INDEX idx_t ON t(a)", mock_db_connection)
+            await agent._get_explain_plan("SELECT 1", mock_db_connection, 1_000_000.0)
+            assert mock_connect.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_skip_if_within_constraints_avoids_llm(self, mock_db_connection, mock_llm_client):
+        """A query already within limits should return before any LLM call."""
+        from src.agent import SQLOptimizationAgent
+
+        agent = SQLOptimizationAgent(llm_client=mock_llm_client)
+
+        with patch.object(agent, '_preflight', return_value=(None, {})), \
+             patch.object(agent, '_get_explain_plan', new_callable=AsyncMock) as mock_explain, \
+             patch.object(agent, '_analyze_query', new_callable=AsyncMock) as mock_analyze:
+            mock_explain.return_value = [{"Plan": {"Node Type": "Index Scan", "Total Cost": 8.3}}]
+
+            result = await agent.optimize_query(
+                sql="SELECT * FROM users WHERE id = 1",
+                db_connection=mock_db_connection,
+                max_cost=100.0,
+                validate_correctness=False,
+                skip_if_within_constraints=True,
+            )
+
+        assert result["success"] is True
+        assert result["actions"] == []
+        assert result["metrics"]["final_cost"] == 8.3
+        mock_analyze.assert_not_called()
+        mock_llm_client.chat.assert_not_called()
+
+    def test_schema_fetcher_kept_per_connection(self, mock_llm_client):
+        """Each database should get its own schema fetcher, reused across queries."""
+        from src.agent import SQLOptimizationAgent
+
+        agent = SQLOptimizationAgent(llm_client=mock_llm_client)
+
+        with patch('src.agent.SchemaFetcher') as mock_fetcher_cls:
+            mock_fetcher_cls.side_effect = lambda dsn: Mock(db_connection=dsn)
+
+            agent._fetch_schema("SELECT 1", "postgresql://localhost/a")
+            agent._fetch_schema("SELECT 2", "postgresql://localhost/b")
+            agent._fetch_schema("SELECT 3", "postgresql://localhost/a")
+
+        assert mock_fetcher_cls.call_count == 2
+        assert agent._schema_fetchers["postgresql://localhost/a"].fetch_schema_for_query.call_count == 2
+        assert agent._schema_fetchers["postgresql://localhost/b"].fetch_schema_for_query.call_count == 1
+
 
 class TestAgentActions:
     """Test agent action types and execution."""
@@ -29,3 +29,15 @@ def test_analyzer_parses_parallel_seq_scan_table_name():
     assert "orders" in sug
     assert "o_custkey" in sug
     assert "o_orderstatus" in sug
+
+
+def test_analyzer_handles_plans_deeper_than_recursion_limit():
+    leaf = {"Node Type": "Seq Scan", "Relation Name": "t", "Plan Rows": 1000, "Total Cost": 1.0}
+    node = leaf
+    for _ in range(sys.getrecursionlimit() + 100):
+        node = {"Node Type": "Materialize", "Total Cost": 1.0, "Plans": [node]}
+
+    analyzer = ExplainAnalyzer(custom_thresholds={"seq_scan_min_rows": 1, "seq_scan_min_cost": 0.5})
+    result = analyzer.analyze([{"Plan": node}])
+
+    assert any(b["table"] == "t" for b in result["bottlenecks"])
@@ -0,0 +1,272 @@
+"""
+Tests for the command-line interface (cli.py)
+"""
+
+import asyncio
+import sys
+import threading
+from types import SimpleNamespace
+
+import cli
+import pytest
+
+
+class TestSplitQueries:
+    """Test splitting --query-file contents into statements."""
+
+    def test_splits_on_semicolons(self):
+        """Each ;-terminated statement should become one query."""
+        text = "SELECT 1;\nSELECT 'a;b' FROM t;\n"
+        assert cli.split_queries(text) == ["SELECT 1;", "SELECT 'a;b' FROM t;"]
+
+    def test_trailing_comment_is_not_a_query(self):
+        """A comment after the last statement must not be optimized as SQL."""
+        text = "SELECT * FROM orders;\n-- TODO: check lineitem too\n"
+        assert cli.split_queries(text) == ["SELECT * FROM orders;"]
+
+    def test_comment_only_file_has_no_queries(self):
+        """A file holding only comments and whitespace yields nothing."""
+        assert cli.split_queries("-- nothing here\n/* or here */\n\n") == []
+
+
+class StubAgent:
+    """Agent stand-in whose optimize_query echoes the query back."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def optimize_query(self, sql, db_connection, **kwargs):
+        self.calls.append(sql)
+        await asyncio.sleep(0.01 if "slow" in sql else 0)
+        if "bad" in sql:
+            raise RuntimeError(f"cannot optimize {sql}")
+        return {
+            "success": True,
+            "final_query": sql,
+            "actions": [],
+            "metrics": {},
+            "reason": "ok",
+        }
+
+
+def batch_args(**overrides):
+    values = {
+        "max_cost": 500.0,
+        "max_time_ms": 50,
+        "concurrency": 1,
+        "no_validation": True,
+        "validate_only": False,
+        "skip_passing": False,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture(autouse=True)
+def empty_result_cache():
+    cli._result_cache.clear()
+    yield
+    cli._result_cache.clear()
+
+
+class TestQueryBatch:
+    """Test optimizing the statements of a --query-file."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("concurrency", [1, 3])
+    async def test_results_in_input_order(self, concurrency, monkeypatch, capsys):
+        """Results come back in file order whichever query finishes first."""
+        agents = []
+
+        def make_agent(args):
+            agents.append(StubAgent())
+            return agents[-1]
+
+        monkeypatch.setattr(cli, "build_agent", make_agent)
+        queries = ["SELECT slow", "SELECT 2", "SELECT 3"]
+
+        results = await cli.optimize_query_batch(
+            StubAgent(), queries, "postgresql://db", batch_args(concurrency=concurrency)
+        )
+
+        assert [r["final_query"] for r in results] == queries
+        assert "Query 1 of 3" in capsys.readouterr().out
+        # Concurrent queries each get a private agent
+        assert len(agents) == (3 if concurrency > 1 else 0)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("concurrency", [1, 2])
+    async def test_failure_reported_per_query(self, concurrency, monkeypatch, capsys):
+        """One failing query is reported and the rest still run."""
+        monkeypatch.setattr(cli, "build_agent", lambda args: StubAgent())
+
+        results = await cli.optimize_query_batch(
+            StubAgent(), ["SELECT 1", "SELECT bad", "SELECT 3"], "postgresql://db",
+            batch_args(concurrency=concurrency),
+        )
+
+        assert isinstance(results[1], RuntimeError)
+        assert results[0]["success"] and results[2]["success"]
+        assert "cannot optimize SELECT bad" in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    async def test_concurrent_progress_output_is_muted(self, monkeypatch, capsys):
+        """Agent progress from concurrent tasks must not reach the terminal."""
+        from src.display import display
+
+        class ChattyAgent(StubAgent):
+            async def optimize_query(self, sql, db_connection, **kwargs):
+                display.info(f"progress for {sql}")
+                return await super().optimize_query(sql, db_connection, **kwargs)
+
+        monkeypatch.setattr(cli, "build_agent", lambda args: ChattyAgent())
+
+        await cli.optimize_query_batch(
+            ChattyAgent(), ["SELECT 1", "SELECT 2"], "postgresql://db", batch_args(concurrency=2)
+        )
+
+        out = capsys.readouterr().out
+        assert "progress for" not in out
+        assert "Query 2 of 2" in out
+
+    @pytest.mark.asyncio
+    async def test_concurrency_below_one_rejected(self, monkeypatch):
+        """--concurrency 0 is a usage error, not a deadlocked semaphore."""
+        monkeypatch.setattr(sys, "argv", ["cli.py", "--concurrency", "0", "--query", "SELECT 1"])
+
+        with pytest.raises(SystemExit) as exc_info:
+            await cli.main()
+
+        assert exc_info.value.code == 2
+
+
+class TestQueryReader:
+    """Test the fallback chat reader used without prompt_toolkit."""
+
+    @pytest.mark.asyncio
+    async def test_loop_keeps_running_while_reading(self, monkeypatch):
+        """Other tasks should make progress while input() waits."""
+        release = threading.Event()
+
+        def slow_read(prompt, continuation_prompt):
+            release.wait(timeout=5)
+            return "SELECT 1;"
+
+        monkeypatch.setattr(cli, "read_query", slow_read)
+        reading = asyncio.create_task(cli.read_query_async("SQL> ", "...> "))
+
+        await asyncio.sleep(0.05)
+        assert not reading.done()
+        release.set()
+
+        assert await reading == "SELECT 1;"
+
+    @pytest.mark.asyncio
+    async def test_eof_reaches_the_awaiting_task(self, monkeypatch):
+        """EOFError from the reader thread should surface in the caller."""
+        def closed_stdin(prompt, continuation_prompt):
+            raise EOFError
+
+        monkeypatch.setattr(cli, "read_query", closed_stdin)
+
+        with pytest.raises(EOFError):
+            await cli.read_query_async("SQL> ", "...> ")
+
+
+class TestParser:
+    """Test the argument parser's built-in options."""
+
+    def test_version_comes_from_package(self, capsys):
+        import src
+
+        with pytest.raises(SystemExit) as exc:
+            cli._build_parser().parse_args(["--version"])
+
+        assert exc.value.code == 0
+        assert capsys.readouterr().out.strip() == f"exque {src.__version__}"
+
+    @pytest.mark.parametrize("argv", [["-h"], ["--help"]])
+    def test_help_lists_options(self, argv, capsys):
+        with pytest.raises(SystemExit):
+            cli._build_parser().parse_args(argv)
+
+        out = capsys.readouterr().out
+        for option in ("--max-cost", "--validate-only", "--concurrency", "--skip-passing"):
+            assert option in out
+
+
+class TestResultCache:
+    """Test the optimization result cache and its query fingerprint."""
+
+    def test_fingerprint_ignores_formatting(self):
+        """Whitespace, comments, keyword case and ';' don't change the key."""
+        assert cli.query_fingerprint(
+            "select *\n  from users -- active only\n where id = 1 ;"
+        ) == cli.query_fingerprint("SELECT * FROM users WHERE id = 1")
+
+    def test_fingerprint_keeps_literals(self):
+        """Literals are part of the key, whitespace inside them included."""
+        base = "SELECT * FROM users WHERE email = 'a  b'"
+        assert cli.query_fingerprint(base) != cli.query_fingerprint(base.replace("a  b", "a b"))
+        assert cli.query_fingerprint(base) != cli.query_fingerprint(base.replace("a  b", "A  B"))
+
+    @pytest.mark.asyncio
+    async def test_hit_on_reformatted_query(self):
+        agent = StubAgent()
+        args = batch_args()
+
+        await cli.optimize_query_cached(agent, "SELECT * FROM users", "db", args, False)
+        await cli.optimize_query_cached(agent, "select *\n  from users;", "db", args, False)
+
+        assert len(agent.calls) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("changed", [
+        {"max_cost": 10.0},
+        {"max_time_ms": 5},
+        {"skip_passing": True},
+    ])
+    async def test_miss_when_constraints_change(self, changed):
+        agent = StubAgent()
+
+        await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(), False)
+        await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(**changed), False)
+
+        assert len(agent.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_miss_when_validation_changes(self):
+        agent = StubAgent()
+
+        await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(), False)
+        await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(), True)
+
+        assert len(agent.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_not_cached(self):
+        class FailingAgent(StubAgent):
+            async def optimize_query(self, sql, db_connection, **kwargs):
+                result = await super().optimize_query(sql, db_connection, **kwargs)
+                return {**result, "success": False}
+
+        agent = FailingAgent()
+
+        await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(), False)
+        await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(), False)
+
+        assert len(agent.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_caller_changes_do_not_reach_cache(self):
+        agent = StubAgent()
+
+        first = await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(), False)
+        first["metrics"]["final_cost"] = -1
+        second = await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(), False)
+        second["reason"] = "changed"
+        third = await cli.optimize_query_cached(agent, "SELECT 1", "db", batch_args(), False)
+
+        assert len(agent.calls) == 1
+        assert third["metrics"] == {}
+        assert third["reason"] == "ok"
@@ -331,6 +331,23 @@ class TestAgentHypoPGIntegration:
             assert agent.can_use_hypopg is True
             assert agent.hypopg_tool is not None
 
+    def test_agent_reuses_detected_extensions(self, mock_db_connection):
+        """Extensions should be detected once per connection string."""
+        from src.agent import SQLOptimizationAgent
+
+        agent = SQLOptimizationAgent()
+
+        with patch('src.agent.psycopg2.connect') as mock_connect, \
+             patch.object(agent.extension_detector, 'detect') as mock_detect:
+            mock_detect.return_value = {"hypopg": "1.3.1"}
+
+            first = agent._preflight("SELECT 1", mock_db_connection, fetch_schema=False)
+            second = agent._preflight("SELECT 2", mock_db_connection, fetch_schema=False)
+
+            assert first == second == (None, {"hypopg": "1.3.1"})
+            mock_detect.assert_called_once()
+            mock_connect.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_execute_test_index_falls_back_without_hypopg(self, mock_db_connection):
         """TEST_INDEX should fall back to CREATE_INDEX without hypopg."""
@@ -63,6 +63,24 @@ class TestExtensionDetectorEdgeCases:
             assert "hypopg" in result
             assert result["hypopg"] is None
 
+    def test_detect_reuses_provided_connection(self):
+        """Detector should use a caller's connection without opening or closing one."""
+        from src.extensions.detector import ExtensionDetector
+
+        detector = ExtensionDetector()
+
+        conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [("hypopg", "1.3.1")]
+        conn.cursor.return_value.__enter__.return_value = mock_cursor
+
+        with patch('psycopg2.connect') as mock_connect:
+            result = detector.detect("postgresql://localhost/test", conn=conn)
+
+            mock_connect.assert_not_called()
+            conn.close.assert_not_called()
+            assert result == {"hypopg": "1.3.1"}
+
     def test_has_hypopg_with_empty_string_version(self):
         """
         has_hypopg treats empty string as truthy (POTENTIAL BUG).
@@ -120,6 +138,55 @@ class TestHypoPGToolEdgeCases:
             assert result.improvement_pct == 0
             assert result.error is None
 
+    def test_test_index_uses_provided_baseline_cost(self):
+        """A known baseline cost should skip the baseline EXPLAIN."""
+        from src.tools.hypopg import HypoPGTool
+
+        tool = HypoPGTool("postgresql://localhost/test")
+
+        with patch('psycopg2.connect') as mock_connect:
+            mock_cursor = MagicMock()
+            mock_cursor.fetchone.side_effect = [
+                (12345,),  # hypopg OID
+                ([{"Plan": {"Total Cost": 50.0}}],),  # Cost with index
+            ]
+            mock_cursor.__enter__ = Mock(return_value=mock_cursor)
+            mock_cursor.__exit__ = Mock(return_value=False)
+            mock_connect.return_value.cursor.return_value = mock_cursor
+
+            result = tool.test_index(
+                "SELECT * FROM t", "CREATE INDEX idx ON t(a)", baseline_cost=100.0
+            )
+
+            assert result.cost_before == 100.0
+            assert result.improvement_pct == 50.0
+            explains = [c for c in mock_cursor.execute.call_args_list if 'EXPLAIN' in str(c)]
+            assert len(explains) == 1
+
+    def test_test_index_passes_index_def_as_parameter(self):
+        """The CREATE INDEX text should be bound as a parameter, not spliced in."""
+        from src.tools.hypopg import HypoPGTool
+
+        tool = HypoPGTool("postgresql://localhost/test")
+        index_def = "CREATE INDEX idx ON t((a || '$$'))"
+
+        with patch('psycopg2.connect') as mock_connect:
+            mock_cursor = MagicMock()
+            mock_cursor.fetchone.side_effect = [
+                (12345,),  # hypopg OID
+                ([{"Plan": {"Total Cost": 50.0}}],),  # Cost with index
+            ]
+            mock_cursor.__enter__ = Mock(return_value=mock_cursor)
+            mock_cursor.__exit__ = Mock(return_value=False)
+            mock_connect.return_value.cursor.return_value = mock_cursor
+
+            tool.test_index("SELECT * FROM t", index_def, baseline_cost=100.0)
+
+            mock_cursor.execute.assert_any_call(
+                "SELECT * FROM hypopg_create_index(%s)", (index_def,)
+            )
+            mock_cursor.execute.assert_any_call("SELECT hypopg_drop_index(%s)", (12345,))
+
     def test_test_index_handles_negative_improvement(self):
         """Test should handle cases where index makes query worse."""
         from src.tools.hypopg import HypoPGTool
@@ -411,6 +478,28 @@ class TestAgentExecuteTestIndexEdgeCases:
     def mock_db_connection(self):
         return "postgresql://localhost:5432/testdb"
 
+    @pytest.mark.asyncio
+    async def test_execute_test_index_skips_virtual_test_for_known_ddl(self, mock_db_connection):
+        """_execute_test_index should not re-test a DDL that already ran or failed."""
+        from src.actions import Action, ActionType
+        from src.agent import SQLOptimizationAgent
+
+        agent = SQLOptimizationAgent()
+        agent.can_use_hypopg = True
+        agent.hypopg_tool = Mock()
+        agent.failed_ddls.add("CREATE INDEX idx ON t(a)")
+
+        action = Action(
+            type=ActionType.TEST_INDEX,
+            ddl="CREATE INDEX idx ON t(a)",
+            reasoning="Test"
+        )
+
+        result = await agent._execute_test_index(action, mock_db_connection, "SELECT * FROM t")
+
+        assert result["success"] is False
+        agent.hypopg_tool.test_index.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_execute_test_index_with_error_result(self, mock_db_connection):
         """_execute_test_index should return error if virtual test fails."""
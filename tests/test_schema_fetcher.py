@@ -108,6 +108,39 @@ class TestTableNameExtraction:
 
         assert 'users' in tables
 
+    def test_extract_excludes_cte_names(self):
+        """Should not report CTE names as tables."""
+        from src.schema_fetcher import SchemaFetcher
+
+        fetcher = SchemaFetcher("postgresql://localhost:5432/testdb")
+        tables = fetcher._extract_table_names(
+            "WITH active_users AS (SELECT * FROM users WHERE active=true) SELECT * FROM active_users"
+        )
+
+        assert tables == ['users']
+
+    def test_extract_excludes_cte_names_with_column_lists(self):
+        """A CTE declared as name(cols) should not be reported as a table."""
+        from src.schema_fetcher import SchemaFetcher
+
+        fetcher = SchemaFetcher("postgresql://localhost:5432/testdb")
+        tables = fetcher._extract_table_names(
+            "WITH x(a) AS (SELECT id FROM users), "
+            "y (b, c) AS (SELECT id, total FROM orders) "
+            "SELECT * FROM x JOIN y ON x.a = y.b"
+        )
+
+        assert sorted(tables) == ['orders', 'users']
+
+    def test_extract_excludes_derived_table_alias(self):
+        """Should not report a subquery alias as a table."""
+        from src.schema_fetcher import SchemaFetcher
+
+        fetcher = SchemaFetcher("postgresql://localhost:5432/testdb")
+        tables = fetcher._extract_table_names("SELECT * FROM (SELECT * FROM users) sub")
+
+        assert tables == ['users']
+
     def test_extract_table_with_alias(self):
         """Should extract table name ignoring alias."""
         from src.schema_fetcher import SchemaFetcher
@@ -150,9 +183,9 @@ class TestSchemaFetching:
         # Mock responses: first for columns, second for indexes, third for foreign keys
         mock_cursor.fetchall.side_effect = [
             [
-                ('id', 'integer', 'NO', 'integer'),
-                ('email', 'character varying', 'NO', 'character varying(255)'),
-                ('created_at', 'timestamp without time zone', 'YES', 'timestamp'),
+                ('users', 'id', 'integer', 'NO', 'integer'),
+                ('users', 'email', 'character varying', 'NO', 'character varying(255)'),
+                ('users', 'created_at', 'timestamp without time zone', 'YES', 'timestamp'),
             ],
             [],  # no indexes
             []   # no foreign keys
@@ -179,8 +212,8 @@ class TestSchemaFetching:
 
         # Mock responses: first for columns, second for indexes
         mock_cursor.fetchall.side_effect = [
-            [('id', 'integer', 'NO', 'integer')],  # columns
-            [('idx_users_email', 'CREATE INDEX idx_users_email ON users USING btree (email)')],  # indexes
+            [('users', 'id', 'integer', 'NO', 'integer')],  # columns
+            [('users', 'idx_users_email', 'CREATE INDEX idx_users_email ON users USING btree (email)')],  # indexes
             []  # foreign keys
         ]
 
@@ -201,7 +234,7 @@ class TestSchemaFetching:
 
         # Mock responses: columns but no indexes
         mock_cursor.fetchall.side_effect = [
-            [('id', 'integer', 'NO', 'integer')],
+            [('users', 'id', 'integer', 'NO', 'integer')],
             [],  # no indexes
             []   # no foreign keys
         ]
@@ -222,9 +255,9 @@ class TestSchemaFetching:
 
         # Mock responses
         mock_cursor.fetchall.side_effect = [
-            [('id', 'integer', 'NO', 'integer'), ('user_id', 'integer', 'NO', 'integer')],
+            [('orders', 'id', 'integer', 'NO', 'integer'), ('orders', 'user_id', 'integer', 'NO', 'integer')],
             [],  # no indexes
-            [('user_id', 'users', 'id')]  # foreign key
+            [('orders', 'user_id', 'users', 'id')]  # foreign key
         ]
 
         fetcher = SchemaFetcher("postgresql://localhost:5432/testdb")
@@ -249,7 +282,7 @@ class TestSchemaFormat:
 
         # Default mock response
         mock_cursor.fetchall.side_effect = [
-            [('id', 'integer', 'NO', 'integer'), ('name', 'varchar', 'NO', 'varchar(100)')],
+            [('users', 'id', 'integer', 'NO', 'integer'), ('users', 'name', 'varchar', 'NO', 'varchar(100)')],
             [],  # no indexes
             []   # no foreign keys
         ]
@@ -315,16 +348,16 @@ class TestFetchSchemaForQuery:
         mock_cursor = MagicMock()
         mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
 
-        # Mock responses for multiple tables
+        # Mock batched responses: one query each for columns, indexes, FKs
         mock_cursor.fetchall.side_effect = [
-            # users table
-            [('id', 'integer', 'NO', 'integer'), ('email', 'varchar', 'NO', 'varchar(255)')],
-            [],  # no indexes
-            [],  # no FKs
-            # orders table
-            [('id', 'integer', 'NO', 'integer'), ('user_id', 'integer', 'NO', 'integer')],
+            [
+                ('orders', 'id', 'integer', 'NO', 'integer'),
+                ('orders', 'user_id', 'integer', 'NO', 'integer'),
+                ('users', 'id', 'integer', 'NO', 'integer'),
+                ('users', 'email', 'varchar', 'NO', 'varchar(255)'),
+            ],
             [],  # no indexes
-            [('user_id', 'users', 'id')]  # FK
+            [('orders', 'user_id', 'users', 'id')]  # FK
         ]
 
         return mock_conn, mock_cursor
@@ -361,6 +394,86 @@ class TestFetchSchemaForQuery:
             assert 'users' in schema
             assert 'orders' in schema
 
+    def test_join_query_uses_single_connection(self, mock_connection):
+        """Should reuse one connection for every table in the query."""
+        from src.schema_fetcher import SchemaFetcher
+
+        mock_conn, mock_cursor = mock_connection
+
+        fetcher = SchemaFetcher("postgresql://localhost:5432/testdb")
+
+        with patch('psycopg2.connect', return_value=mock_conn) as mock_connect:
+            fetcher.fetch_schema_for_query(
+                "SELECT * FROM users u JOIN orders o ON u.id = o.user_id"
+            )
+
+            assert mock_connect.call_count == 1
+            mock_conn.close.assert_called_once()
+
+    def test_join_query_batches_metadata_queries(self, mock_connection):
+        """Should issue three metadata queries total, not three per table."""
+        from src.schema_fetcher import SchemaFetcher
+
+        mock_conn, mock_cursor = mock_connection
+
+        fetcher = SchemaFetcher("postgresql://localhost:5432/testdb")
+
+        with patch('psycopg2.connect', return_value=mock_conn):
+            schema = fetcher.fetch_schema_for_query(
+                "SELECT * FROM users u JOIN orders o ON u.id = o.user_id"
+            )
+
+            assert mock_cursor.execute.call_count == 3
+            _, params = mock_cursor.execute.call_args_list[0].args
+            assert params == ('public', ['orders', 'users'])
+            assert 'user_id -> users(id)' in schema
+
+    def test_repeat_query_served_from_cache(self, mock_connection):
+        """Should not query the database again until the cache is invalidated."""
+        from src.schema_fetcher import SchemaFetcher
+
+        mock_conn, mock_cursor = mock_connection
+
+        fetcher = SchemaFetcher("postgresql://localhost:5432/testdb")
+
+        with patch('psycopg2.connect', return_value=mock_conn) as mock_connect:
+            sql = "SELECT * FROM users u JOIN orders o ON u.id = o.user_id"
+            first = fetcher.fetch_schema_for_query(sql)
+            second = fetcher.fetch_schema_for_query(sql)
+
+            assert first == second
+            assert mock_connect.call_count == 1
+
+            fetcher.invalidate_cache()
+            mock_cursor.fetchall.side_effect = None
+            mock_cursor.fetchall.return_value = []
+            fetcher.fetch_schema_for_query(sql)
+            assert mock_connect.call_count == 2
+
+    def test_cached_schema_expires(self, mock_connection):
+        """DDL from outside the agent should show up once the TTL passes."""
+        from src.schema_fetcher import SchemaFetcher
+
+        mock_conn, mock_cursor = mock_connection
+
+        fetcher = SchemaFetcher("postgresql://localhost:5432/testdb")
+
+        with patch('psycopg2.connect', return_value=mock_conn) as mock_connect, \
+             patch('src.schema_fetcher.time.monotonic') as mock_clock:
+            sql = "SELECT * FROM users u JOIN orders o ON u.id = o.user_id"
+            mock_clock.return_value = 1000.0
+            fetcher.fetch_schema_for_query(sql)
+
+            mock_cursor.fetchall.side_effect = None
+            mock_cursor.fetchall.return_value = []
+            mock_clock.return_value = 1000.0 + SchemaFetcher.SCHEMA_CACHE_TTL_S - 1
+            fetcher.fetch_schema_for_query(sql)
+            assert mock_connect.call_count == 1
+
+            mock_clock.return_value = 1000.0 + SchemaFetcher.SCHEMA_CACHE_TTL_S
+            fetcher.fetch_schema_for_query(sql)
+            assert mock_connect.call_count == 2
+
     def test_handles_table_not_found(self):
         """Should handle gracefully when table doesn't exist."""
         from src.schema_fetcher import SchemaFetcher
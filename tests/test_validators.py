@@ -294,6 +294,50 @@ class TestNoRECValidator:
         assert "(SELECT age > 25) = TRUE" in non_opt
         assert "WHERE" in non_opt
 
+    def test_count_rows_counts_server_side(self):
+        """Row counts should come from a count(*) wrapper, not fetched rows"""
+        from unittest.mock import Mock
+
+        validator = NoRECValidator()
+        cursor = Mock()
+        cursor.fetchone.return_value = (42,)
+
+        count = validator._count_rows(cursor, "SELECT * FROM users WHERE age > 25 -- adults\n;")
+
+        assert count == 42
+        cursor.execute.assert_called_once_with(
+            "SELECT count(*) FROM (\nSELECT * FROM users WHERE age > 25\n) AS norec_rows"
+        )
+        cursor.fetchall.assert_not_called()
+
+    def test_count_rows_strips_comment_after_semicolon(self):
+        """A comment after the final ';' must not leave the ';' inside the wrapper"""
+        from unittest.mock import Mock
+
+        validator = NoRECValidator()
+        cursor = Mock()
+        cursor.fetchone.return_value = (7,)
+
+        count = validator._count_rows(cursor, "SELECT id FROM users WHERE age > 25; -- note")
+
+        assert count == 7
+        cursor.execute.assert_called_once_with(
+            "SELECT count(*) FROM (\nSELECT id FROM users WHERE age > 25\n) AS norec_rows"
+        )
+
+    @pytest.mark.asyncio
+    async def test_missing_sqlparse_reports_dependency_error(self, monkeypatch):
+        """NoREC should report a dependency error when sqlparse is missing"""
+        from src.validators import differential
+
+        monkeypatch.setattr(differential, "sqlparse", None)
+        validator = NoRECValidator()
+
+        result = await validator.validate("SELECT * FROM users WHERE age > 25", TEST_DB_CONNECTION)
+
+        assert not result.passed
+        assert result.issues[0].issue_type == "DEPENDENCY_ERROR"
+
     @pytest.mark.asyncio
     async def test_query_with_order_by(self):
         """NoREC should handle queries with ORDER BY clause"""